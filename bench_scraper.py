@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Offline scraper benchmark against recorded plancke.io fixtures
+
+Scrubbed fixtures for a player in a guild, one without a guild, one with
+missing mode rows and a 404 are checked in under data/fixtures.
+
+Record more (needs network):
+    python bench_scraper.py record with_guild SomePlayer "player in a guild"
+    python bench_scraper.py record no_guild OtherPlayer "player without guild"
+    python bench_scraper.py record missing NoSuchPlayer123 "404"
+
+Then benchmark offline:
+    python bench_scraper.py run --iterations 200
+"""
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+from config.settings import SCRAPER_BASE_URL, SCRAPER_UNKNOWN_BLOOM_CAPACITY, SCRAPER_UNKNOWN_BLOOM_ERROR_RATE, FIXTURES_DIR
+from shared.cache_utils import BloomFilter
+from shared.rate_limit_utils import TokenBucket
+from minecraft_bot.fixtures import record_fixture, load_fixtures, ReplaySession
+from minecraft_bot.stats import HypixelScraper, _StatsRowsWatcher
+from minecraft_bot.stats_store import StatsStore
+
+def _reset_scraper(session, bloom_file):
+    """Points the scraper at the replay session with empty caches and no rate limit"""
+    HypixelScraper._session = session
+    HypixelScraper.page_cache.clear()
+    HypixelScraper.profile_cache.clear()
+    HypixelScraper.negative_cache.clear()
+    HypixelScraper.get_store().clear()
+    HypixelScraper._unknown_players = BloomFilter(SCRAPER_UNKNOWN_BLOOM_CAPACITY, SCRAPER_UNKNOWN_BLOOM_ERROR_RATE)
+    HypixelScraper.unknown_players_file = bloom_file
+
+def _stream_parse(content):
+    """Feeds a page to the streaming watcher the way the scraper does"""
+    watcher = _StatsRowsWatcher()
+    try:
+        for i in range(0, len(content), 16384):
+            if watcher.feed(content[i:i + 16384]):
+                break
+    finally:
+        watcher.close()
+
+def _benchmarks(fixture, session, bloom_file):
+    """Returns (name, callable) pairs to measure for a fixture"""
+    content = fixture.content
+    username = fixture.username
+
+    def end_to_end(func):
+        def run():
+            _reset_scraper(session, bloom_file)
+            func()
+        return run
+
+    benchmarks = [
+        ('get_bedwars_stats', end_to_end(lambda: HypixelScraper.get_bedwars_stats(username, 'bw', 'all'))),
+        ('get_guild_info', end_to_end(lambda: HypixelScraper.get_guild_info(username))),
+    ]
+    if fixture.status_code == 200:
+        benchmarks += [
+            ('parse_bedwars_profile', lambda: HypixelScraper._parse_bedwars_profile(content)),
+            ('parse_guild_info', lambda: HypixelScraper._parse_guild_info(content)),
+            ('stream_watcher', lambda: _stream_parse(content)),
+        ]
+    return benchmarks
+
+def _measure(func, iterations):
+    """Returns latency percentiles in ms and allocation figures for a callable"""
+    func()  # warm-up
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Allocations are measured on a separate run, tracemalloc skews timings
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+
+    # Inclusive: percentiles stay within the measured range, even with few iterations
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive') if len(timings) > 1 else timings * 99
+    return {
+        'p50': quantiles[49],
+        'p90': quantiles[89],
+        'p99': quantiles[98],
+        'max': max(timings),
+        'peak_kib': peak / 1024,
+        'retained_kib': allocated / 1024
+    }
+
+def run(iterations, directory):
+    fixtures = load_fixtures(directory)
+    if not fixtures:
+        print(f"No fixtures in {directory}, record some first (see --help)")
+        return 1
+
+    session = ReplaySession(fixtures)
+    HypixelScraper._store = StatsStore(':memory:')
+    HypixelScraper.rate_limiter = TokenBucket(1e9, 1e9)
+
+    print(f"{'fixture':<16} {'benchmark':<22} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'max ms':>8} {'peak KiB':>9} {'kept KiB':>9}")
+    with tempfile.NamedTemporaryFile(suffix='.bloom') as bloom_file:
+        for fixture in fixtures:
+            for name, func in _benchmarks(fixture, session, bloom_file.name):
+                result = _measure(func, iterations)
+                print(f"{fixture.label:<16} {name:<22} {result['p50']:>8.3f} {result['p90']:>8.3f} "
+                      f"{result['p99']:>8.3f} {result['max']:>8.3f} {result['peak_kib']:>9.1f} "
+                      f"{result['retained_kib']:>9.1f}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', default=str(FIXTURES_DIR), help="fixtures directory")
+    subparsers = parser.add_subparsers(dest='action', required=True)
+
+    record_parser = subparsers.add_parser('record', help="record a live plancke.io response")
+    record_parser.add_argument('label')
+    record_parser.add_argument('username')
+    record_parser.add_argument('note', nargs='?', default="")
+
+    run_parser = subparsers.add_parser('run', help="benchmark the parsers against recorded fixtures")
+    run_parser.add_argument('--iterations', type=int, default=100)
+
+    args = parser.parse_args()
+
+    if args.action == 'record':
+        logging.basicConfig(level=logging.INFO)
+        record_fixture(HypixelScraper._get_session(), SCRAPER_BASE_URL, args.label, args.username,
+                       args.note, args.fixtures)
+        return 0
+
+    # Keep the [TIMING] logs out of the measurements
+    logging.disable(logging.CRITICAL)
+    return run(args.iterations, args.fixtures)
+
+if __name__ == "__main__":
+    sys.exit(main())
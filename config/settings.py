@@ -15,6 +15,10 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 SHORTCUTS_FILE = str(DATA_DIR / "shortcuts.json")
 USER_SHORTCUTS_FILE = str(DATA_DIR / "user_shortcuts.json")
 LOCK_FILE = str(DATA_DIR / "z30_running.lock")
+UNKNOWN_PLAYERS_FILE = str(DATA_DIR / "unknown_players.bloom")
+STATS_DB_FILE = str(DATA_DIR / "stats.db")
+HISTORY_DB_FILE = str(DATA_DIR / "stats_history.db")
+FIXTURES_DIR = DATA_DIR / "fixtures"
 
 # Fichiers de logs
 MINECRAFT_LOG_FILE = str(LOGS_DIR / "latest.log")
@@ -24,8 +28,73 @@ DISCORD_LOG_FILE = str(LOGS_DIR / "bot.log")
 MINECRAFT_CLIENT_PATH = "MinecraftClient.exe"
 BOT_USERNAME = "ourbot"
 
+RECONNECT_JOIN_TIMEOUT = 60     # secondes d'attente de la connexion au serveur
+RECONNECT_BASE_DELAY = 2.0      # secondes avant une nouvelle tentative, doublées à chaque échec (avec gigue)
+RECONNECT_MAX_DELAY = 60.0
+
+# Scraper Plancke.io
+SCRAPER_PAGE_CACHE_TTL = 120       # secondes de validité d'une page en cache
+SCRAPER_PAGE_CACHE_SIZE = 256      # nombre maximal de pages gardées en mémoire
+SCRAPER_PROFILE_CACHE_TTL = 300    # secondes de validité d'un profil BedWars déjà analysé
+SCRAPER_PROFILE_CACHE_SIZE = 512   # nombre maximal de profils gardés en mémoire
+SCRAPER_BASE_URL = "https://plancke.io"
+SCRAPER_CONNECT_TIMEOUT = 3.05     # secondes pour établir la connexion
+SCRAPER_READ_TIMEOUT = 10          # secondes entre deux paquets reçus
+SCRAPER_POOL_SIZE = 8              # connexions keep-alive gardées ouvertes
+SCRAPER_PREWARM = True             # ouvrir la connexion au démarrage du CommandHandler
+SCRAPER_MAX_CONCURRENCY_PER_HOST = 4  # requêtes simultanées maximales vers plancke.io
+STATS_FETCH_WORKERS = 8            # threads récupérant les joueurs d'une même commande
+COMMAND_JOB_WORKERS = 4            # commandes du chat exécutées en parallèle
+COMMAND_RESERVED_WORKERS = 1       # threads réservés aux commandes sans requête réseau
+SCRAPER_STREAMING_FETCH = False    # couper la connexion dès que le tableau BedWars est reçu (coûte une nouvelle poignée de main)
+SCRAPER_STREAM_CHUNK_SIZE = 16384  # octets lus à chaque itération en mode streaming
+SCRAPER_STREAM_MIN_SKIP = 262144   # octets restants au-delà desquels couper vaut une nouvelle connexion, sinon la page est lue en entier
+SCRAPER_NEGATIVE_CACHE_TTL = 600   # secondes pendant lesquelles un joueur introuvable n'est pas recherché
+SCRAPER_NEGATIVE_CACHE_SIZE = 1024
+SCRAPER_UNKNOWN_BLOOM_CAPACITY = 10000    # joueurs introuvables mémorisés entre les redémarrages
+SCRAPER_UNKNOWN_BLOOM_ERROR_RATE = 0.001  # taux de faux positifs du filtre
+SCRAPER_UNKNOWN_BLOOM_MAX_AGE = 7 * 24 * 3600  # le filtre est réinitialisé après une semaine
+STATS_STORE_FRESH_AGE = 600        # secondes pendant lesquelles un profil stocké est servi tel quel
+STATS_STORE_MAX_AGE = 30 * 24 * 3600  # au-delà, le profil stocké ne sert qu'en cas de panne de plancke.io
+SCRAPER_RATE_LIMIT = 2.0           # requêtes par seconde maximum vers plancke.io
+SCRAPER_RATE_BURST = 4             # requêtes pouvant partir d'un coup
+SCRAPER_RATE_MIN = 0.25            # débit plancher après des réponses 429
+SCRAPER_RATE_INCREASE = 0.05       # débit regagné à chaque requête réussie
+SCRAPER_RATE_WAIT_TIMEOUT = 10     # secondes d'attente maximum d'un jeton
+SCRAPER_MAX_RETRIES = 2            # nouvelles tentatives après 429/5xx/timeout
+SCRAPER_RETRY_BASE_DELAY = 0.5     # secondes, doublées à chaque tentative (avec gigue)
+SCRAPER_RETRY_MAX_DELAY = 8
+SCRAPER_BREAKER_WINDOW = 20        # dernières requêtes prises en compte par le disjoncteur
+SCRAPER_BREAKER_MIN_CALLS = 5
+SCRAPER_BREAKER_FAILURE_RATIO = 0.5
+SCRAPER_BREAKER_SLOW_CALL = 5.0    # secondes au-delà desquelles une requête compte comme un échec
+SCRAPER_BREAKER_OPEN_DURATION = 30 # secondes de coupure avant un nouvel essai
+
+# Classement de la guilde (commande lb)
+LEADERBOARD_SIZE = 5               # joueurs affichés par la commande lb
+LEADERBOARD_REFRESH_INTERVAL = 30  # secondes entre deux rafraîchissements en arrière-plan
+LEADERBOARD_MAX_AGE = 6 * 3600     # âge à partir duquel les stats d'un membre sont rafraîchies
+ROSTER_MAX_ABSENCE = 30 * 86400    # secondes sans être vu dans /g online avant de sortir du classement
+
+# Historique des stats (commandes bw -session / bw -delta)
+HISTORY_KEYFRAME_INTERVAL = 32     # un instantané complet toutes les 32 entrées, des différences sinon
+
+# Préchargement des stats des membres qui viennent de se connecter
+PREFETCH_ENABLED = False           # désactivé par défaut
+PREFETCH_MIN_INTERVAL = 5.0        # secondes minimum entre deux préchargements
+PREFETCH_QUEUE_SIZE = 200          # joueurs en attente de préchargement
+
 # Paramètres de message
 MESSAGE_COOLDOWN = 1.0  # secondes entre chaque message
+CHAT_SEND_RATE = 1.5    # messages par seconde vers Hypixel (seau à jetons)
+CHAT_SEND_BURST = 3     # messages pouvant partir d'un coup avant d'être ralentis
+CHAT_COALESCE = False   # fusionner les messages courts d'une même voie en une seule ligne
+CHAT_COALESCE_WINDOW = 0.3  # secondes d'attente maximum d'un message court avant son envoi
+EVENT_QUEUE_SIZE = 1000  # événements en attente par abonné avant de perdre les plus anciens
+GONLINE_TIMEOUT = 5      # secondes d'attente de la réponse à /g online
+OUTPUT_BUFFER_SIZE = 500 # dernières lignes du client gardées pour reconnaître les réponses aux commandes
+CHAT_LINE_LIMIT = 92    # caractères maximum d'une ligne /gc
+CHAT_AGGREGATE_RESULTS = True  # regrouper les résultats d'une commande sur le moins de lignes possible
 
 # Serveur Webhook (pour la communication Discord)
 FLASK_HOST = '0.0.0.0'
@@ -6,50 +6,130 @@ import re
 import logging
 import random
 import os
-from queue import Queue, Empty
+from itertools import islice
+from collections import deque
 
-from config.settings import MINECRAFT_CLIENT_PATH, BOT_USERNAME
+from shared.rate_limit_utils import TokenBucket, backoff_delay
+from minecraft_bot.events import (
+    EventBus, LineClassifier, ServerJoinedEvent, DuplicateMessageEvent, ConnectionLostEvent, clean_line
+)
+from config.settings import (
+    MINECRAFT_CLIENT_PATH, BOT_USERNAME, CHAT_LINE_LIMIT, CHAT_SEND_RATE, CHAT_SEND_BURST,
+    CHAT_COALESCE, CHAT_COALESCE_WINDOW, OUTPUT_BUFFER_SIZE, RECONNECT_JOIN_TIMEOUT,
+    RECONNECT_BASE_DELAY, RECONNECT_MAX_DELAY, TIMING_PREFIX
+)
 
 logger = logging.getLogger('minecraft_bot.client')
 
+# Voies de la file d'envoi, la plus basse part en premier
+LANE_SYSTEM = 0   # commandes du bot et de l'administrateur
+LANE_REPLY = 1    # réponses aux commandes du chat
+LANE_RELAY = 2    # messages relayés depuis Discord
+LANE_NAMES = ('system', 'reply', 'relay')
+
+# Séparateur des champs dans les réponses du bot
+CHAT_SEPARATOR = " ┃ "
+
+# Préfixe des lignes de chat de guilde dans la file d'envoi
+GUILD_CHAT_PREFIX = "/send /gc "
+
+def _line_matcher(pattern):
+    """Transforme un texte (contenu dans la ligne), une regex ou une fonction en fonction de test"""
+    if callable(pattern):
+        return pattern
+    if hasattr(pattern, 'search'):
+        return lambda line: pattern.search(line) is not None
+    return lambda line: pattern in line
+
+def _split_long_segment(segment, limit):
+    """Coupe un segment trop long sur les espaces, au milieu d'un mot en dernier recours"""
+    if len(segment) <= limit:
+        return [segment]
+    
+    pieces = []
+    current = ""
+    for word in segment.split(' '):
+        while len(word) > limit:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:limit])
+            word = word[limit:]
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) <= limit:
+            current = candidate
+        else:
+            pieces.append(current)
+            current = word
+    if current:
+        pieces.append(current)
+    return pieces
+
+def pack_chat_lines(messages, limit=CHAT_LINE_LIMIT, separator=CHAT_SEPARATOR):
+    """Regroupe des messages sur le moins de lignes possible, en coupant sur les séparateurs"""
+    lines = []
+    current = ""
+    for message in messages:
+        for segment in message.split(separator):
+            for piece in _split_long_segment(segment, limit):
+                candidate = f"{current}{separator}{piece}" if current else piece
+                if len(candidate) <= limit:
+                    current = candidate
+                else:
+                    lines.append(current)
+                    current = piece
+    if current:
+        lines.append(current)
+    return lines
+
 class MinecraftClient:
     """Gère l'interaction avec le client Minecraft via subprocess"""
     
     def __init__(self):
         self.process = None
+        self.running = False
         self.server_joined = False
+        self.connection_lost = False
+        # Vrai une fois /limbo en tête de file, l'envoi des messages reprend alors
+        self.session_ready = False
         self.last_sent_message = None
         self.last_sender = None
         self.retry_count = 0
         
-        # Files d'attente et verrous
-        self.command_queue = Queue()
+        # File d'envoi à plusieurs voies, cadencée par un seau à jetons
+        self.outbound_lanes = [deque() for _ in LANE_NAMES]
+        self.outbound_cond = threading.Condition()
+        self.outbound_bucket = TokenBucket(CHAT_SEND_RATE, CHAT_SEND_BURST)
+        self.outbound_sent = [0] * len(LANE_NAMES)
+        self.outbound_delay_total = [0.0] * len(LANE_NAMES)
+        self.outbound_delay_max = [0.0] * len(LANE_NAMES)
+        self.outbound_coalesced = [0] * len(LANE_NAMES)
         self.last_sent_lock = threading.Lock()
+        
+        # Chaque ligne de sortie est analysée une fois puis publiée aux abonnés
+        self.events = EventBus()
+        
+        # Dernières lignes de sortie nettoyées, numérotées, pour request()
+        self.recent_output = deque(maxlen=OUTPUT_BUFFER_SIZE)
+        self.output_seq = 0
+        self.output_cond = threading.Condition()
+        
+        # Reconnexion supervisée : seul le processus du client est relancé
+        self.reconnect_lock = threading.Lock()
+        self.supervised = False  # vrai une fois le premier démarrage réussi
+        self.reconnecting = False
+        self.reconnect_count = 0
+        self.last_recovery_time = None
     
     def start(self):
         """Démarre le client Minecraft"""
         logger.info(f"Démarrage du client Minecraft...")
         
         try:
-            # Vérifier que le chemin du client existe
-            if not os.path.exists(MINECRAFT_CLIENT_PATH):
-                logger.error(f"Chemin du client Minecraft invalide: {MINECRAFT_CLIENT_PATH}")
-                logger.error(f"Répertoire courant: {os.getcwd()}")
-                logger.error(f"Contenu du répertoire: {os.listdir('.')}")
-                raise FileNotFoundError(f"Client Minecraft introuvable: {MINECRAFT_CLIENT_PATH}")
-                
-            # Démarrer le processus
-            self.process = subprocess.Popen(
-                [MINECRAFT_CLIENT_PATH],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                encoding='utf-8',
-                errors='replace',
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            self.running = True
+            
+            # Démarrer le processus et sa lecture
+            self._launch_process()
             
             # Démarrer les threads
             self._start_threads()
@@ -57,9 +137,16 @@ class MinecraftClient:
             # Attendre la connexion au serveur
             self._wait_for_server_join()
             
-            # Initialiser limbo après connexion
+            # Les coupures suivantes sont rattrapées par une reconnexion
+            self.supervised = True
+            
+            # Initialiser limbo après connexion, sauf si la connexion a été perdue entre-temps
             time.sleep(random.uniform(3, 7))
-            self.send_command('/limbo')
+            with self.reconnect_lock:
+                # Une reconnexion lancée pendant l'attente envoie elle-même /limbo
+                resumed = self.reconnecting or self.session_ready
+            if not resumed and not self._resume_sending():
+                self._schedule_reconnect("connexion perdue pendant le démarrage")
             
             logger.info("Client Minecraft démarré et connecté au serveur")
             return True
@@ -68,17 +155,45 @@ class MinecraftClient:
             logger.error(f"Erreur lors du démarrage du client Minecraft: {e}")
             import traceback
             logger.error(traceback.format_exc())
+            self.running = False
             return False
     
-    def _start_threads(self):
-        """Démarre les threads de lecture et d'écriture"""
-        # Thread de lecture de la sortie du client
+    def _launch_process(self):
+        """Lance le processus du client et le thread qui lit sa sortie"""
+        # Vérifier que le chemin du client existe
+        if not os.path.exists(MINECRAFT_CLIENT_PATH):
+            logger.error(f"Chemin du client Minecraft invalide: {MINECRAFT_CLIENT_PATH}")
+            logger.error(f"Répertoire courant: {os.getcwd()}")
+            logger.error(f"Contenu du répertoire: {os.listdir('.')}")
+            raise FileNotFoundError(f"Client Minecraft introuvable: {MINECRAFT_CLIENT_PATH}")
+        
+        self.server_joined = False
+        self.connection_lost = False
+        self.session_ready = False
+        
+        # Démarrer le processus
+        self.process = subprocess.Popen(
+            [MINECRAFT_CLIENT_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            encoding='utf-8',
+            errors='replace',
+            text=True,
+            bufsize=1,
+            universal_newlines=True
+        )
+        
+        # Thread de lecture de la sortie du client, propre à ce processus
         output_thread = threading.Thread(
             target=self._read_output,
+            args=(self.process,),
             daemon=True
         )
         output_thread.start()
-        
+    
+    def _start_threads(self):
+        """Démarre les threads d'entrée et d'envoi, gardés d'une reconnexion à l'autre"""
         # Thread pour lire les entrées utilisateur
         input_thread = threading.Thread(
             target=self._read_input,
@@ -95,23 +210,26 @@ class MinecraftClient:
     
     def _wait_for_server_join(self):
         """Attend que le client soit connecté au serveur"""
-        timeout = 60  # secondes
+        timeout = RECONNECT_JOIN_TIMEOUT
         start_time = time.time()
         
         while not self.server_joined:
+            if self.connection_lost:
+                raise ConnectionError("Connexion refusée par le serveur")
             elapsed = time.time() - start_time
             if elapsed > timeout:
                 logger.error(f"Timeout de connexion au serveur après {timeout} secondes")
                 raise TimeoutError("Timeout lors de la connexion au serveur")
             time.sleep(0.5)
     
-    def _read_output(self):
-        """Thread pour lire la sortie du client Minecraft"""
-        while self.process and self.process.poll() is None:
+    def _read_output(self, process):
+        """Thread pour lire la sortie d'un processus du client Minecraft"""
+        line_classifier = LineClassifier()
+        while process.poll() is None:
             try:
-                output = self.process.stdout.readline()
+                output = process.stdout.readline()
                 if not output:
-                    if self.process.poll() is not None:
+                    if process.poll() is not None:
                         break
                     continue
                 
@@ -119,18 +237,116 @@ class MinecraftClient:
                 output = output.strip()
                 logger.info(output)
                 
+                with self.output_cond:
+                    self.recent_output.append(clean_line(output))
+                    self.output_seq += 1
+                    self.output_cond.notify_all()
+                
+                event = line_classifier.feed(output)
+                # Les dernières lignes d'un processus remplacé ne touchent plus à l'état de la session
+                if event is None or process is not self.process:
+                    continue
+                
                 # Détecter la connexion au serveur
-                if "[MCC] Server was successfully joined." in output:
+                if isinstance(event, ServerJoinedEvent):
                     self.server_joined = True
                 
                 # Message double ?
-                if "You cannot say the same message twice!" in output:
+                elif isinstance(event, DuplicateMessageEvent):
                     self._handle_duplicate_message()
+                
+                # Connexion perdue : relancer le client sans quitter le bot
+                elif isinstance(event, ConnectionLostEvent):
+                    self.server_joined = False
+                    self.session_ready = False
+                    self.connection_lost = True
+                    self._schedule_reconnect(event.reason)
+                
+                self.events.publish(event)
             
             except Exception as e:
                 logger.error(f"Erreur lors de la lecture de la sortie: {e}")
                 import traceback
                 logger.error(traceback.format_exc())
+        
+        # Le processus s'est arrêté sans qu'on le lui demande
+        if self.running and process is self.process:
+            self._schedule_reconnect("processus du client arrêté")
+    
+    def _schedule_reconnect(self, reason):
+        """Lance la reconnexion supervisée si elle n'est pas déjà en cours"""
+        with self.reconnect_lock:
+            if self.reconnecting or not self.running or not self.supervised:
+                return
+            self.reconnecting = True
+        
+        logger.warning(f"Connexion perdue ({reason}), reconnexion...")
+        threading.Thread(target=self._reconnect, daemon=True).start()
+    
+    def _reconnect(self):
+        """Relance le processus du client avec backoff, en gardant files, caches et threads"""
+        started = time.monotonic()
+        attempt = 0
+        try:
+            while self.running:
+                self._terminate_process(self.process)
+                if attempt:
+                    time.sleep(backoff_delay(attempt - 1, RECONNECT_BASE_DELAY, RECONNECT_MAX_DELAY))
+                
+                try:
+                    self._launch_process()
+                    self._wait_for_server_join()
+                except Exception as e:
+                    attempt += 1
+                    logger.warning(f"Tentative de reconnexion {attempt} échouée: {e}")
+                    continue
+                
+                if self._resume_sending():
+                    break
+                attempt += 1
+                logger.warning(f"Tentative de reconnexion {attempt} échouée: connexion perdue juste après l'arrivée")
+            
+            if not self.running:
+                return
+            
+            self.reconnect_count += 1
+            self.last_recovery_time = time.monotonic() - started
+            logger.info(f"{TIMING_PREFIX}Client reconnecté en {self.last_recovery_time:.1f}s "
+                        f"({attempt + 1} tentative(s), {self.reconnect_count} reconnexion(s) au total)")
+        finally:
+            with self.reconnect_lock:
+                self.reconnecting = False
+    
+    def _resume_sending(self):
+        """Met /limbo en tête de file puis laisse partir les messages restés en attente
+
+        Renvoie False, sans rien débloquer, si la connexion a été perdue depuis l'arrivée sur le serveur.
+        """
+        with self.outbound_cond:
+            process = self.process
+            if self.connection_lost or process is None or process.poll() is not None:
+                return False
+            system = self.outbound_lanes[LANE_SYSTEM]
+            # Un /limbo d'une session précédente jamais parti ferait doublon
+            if system and system[0][0] == '/send /limbo':
+                system.popleft()
+            system.appendleft(('/send /limbo', time.perf_counter()))
+            self.session_ready = True
+            self.outbound_cond.notify()
+        return True
+    
+    def _terminate_process(self, process):
+        """Arrête un processus du client, de force s'il ne répond pas"""
+        if not process or process.poll() is not None:
+            return
+        try:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'arrêt du processus du client: {e}")
     
     def _handle_duplicate_message(self):
         """Gère le cas où un message est refusé car identique au précédent"""
@@ -154,7 +370,7 @@ class MinecraftClient:
     
     def _read_input(self):
         """Thread pour lire les entrées de l'utilisateur"""
-        while self.process and self.process.poll() is None:
+        while self.running:
             try:
                 user_input = input()
                 if user_input.strip():
@@ -165,23 +381,106 @@ class MinecraftClient:
                 logger.error(f"Erreur lors de la lecture de l'entrée: {e}")
     
     def _process_command_queue(self):
-        """Thread pour traiter la file d'attente des commandes"""
-        while self.process and self.process.poll() is None:
+        """Thread pour traiter la file d'envoi, voie par voie, au rythme du seau à jetons"""
+        while self.running:
             try:
-                command = self.command_queue.get(timeout=0.5)
-                if command is None:
-                    break
+                with self.outbound_cond:
+                    # Pendant une reconnexion, les messages restent en file
+                    if not any(self.outbound_lanes) or not self.connected():
+                        self.outbound_cond.wait(0.5)
+                        continue
+                    
+                    # Laisser à un message court le temps d'être rejoint par les suivants
+                    hold = self._coalesce_hold() if CHAT_COALESCE else 0
+                    if hold > 0:
+                        self.outbound_cond.wait(hold)
+                        continue
+                
+                # Le jeton est pris avant de choisir le message, un message système arrivé entre-temps passe devant
+                self.outbound_bucket.acquire()
                 
-                self._send_raw_command(command)
-                self.command_queue.task_done()
+                with self.outbound_cond:
+                    lane = next(i for i, queue in enumerate(self.outbound_lanes) if queue)
+                    messages = [self.outbound_lanes[lane].popleft()]
+                    if CHAT_COALESCE:
+                        self._coalesce(lane, messages)
+                    
+                    now = time.perf_counter()
+                    for _, queued_at in messages:
+                        delay = now - queued_at
+                        self.outbound_sent[lane] += 1
+                        self.outbound_delay_total[lane] += delay
+                        if delay > self.outbound_delay_max[lane]:
+                            self.outbound_delay_max[lane] = delay
                 
-                # Petit délai pour éviter le spam
-                time.sleep(0.1)
-            except Empty:
-                pass
+                if len(messages) > 1:
+                    command = GUILD_CHAT_PREFIX + CHAT_SEPARATOR.join(
+                        message[len(GUILD_CHAT_PREFIX):] for message, _ in messages
+                    )
+                    with self.last_sent_lock:
+                        self.last_sent_message = command[len("/send "):]
+                else:
+                    command = messages[0][0]
+                
+                if not self._send_raw_command(command):
+                    # Connexion coupée entre-temps, les messages repartiront après la reconnexion
+                    with self.outbound_cond:
+                        self.outbound_lanes[lane].extendleft(reversed(messages))
             except Exception as e:
                 logger.error(f"Erreur lors du traitement de la commande: {e}")
     
+    def _coalesce_hold(self):
+        """Temps restant avant l'envoi d'un message de chat court en tête de file (verrou pris)"""
+        # Attendre seulement si une autre ligne de la voie peut déjà le rejoindre, une réponse seule part tout de suite
+        lane = next(queue for queue in self.outbound_lanes if queue)
+        if len(lane) < 2:
+            return 0
+        (command, queued_at), (next_command, _) = lane[0], lane[1]
+        if not command.startswith(GUILD_CHAT_PREFIX) or not next_command.startswith(GUILD_CHAT_PREFIX):
+            return 0
+        length = len(command) + len(CHAT_SEPARATOR) + len(next_command) - 2 * len(GUILD_CHAT_PREFIX)
+        if length > CHAT_LINE_LIMIT:
+            return 0
+        return queued_at + CHAT_COALESCE_WINDOW - time.perf_counter()
+    
+    def _coalesce(self, lane, messages):
+        """Ajoute à messages les lignes de chat qui le suivent dans la voie et tiennent sur la même ligne"""
+        queue = self.outbound_lanes[lane]
+        command = messages[0][0]
+        if not command.startswith(GUILD_CHAT_PREFIX):
+            return
+        
+        length = len(command) - len(GUILD_CHAT_PREFIX)
+        while queue and queue[0][0].startswith(GUILD_CHAT_PREFIX):
+            next_length = length + len(CHAT_SEPARATOR) + len(queue[0][0]) - len(GUILD_CHAT_PREFIX)
+            if next_length > CHAT_LINE_LIMIT:
+                break
+            messages.append(queue.popleft())
+            length = next_length
+        
+        if len(messages) > 1:
+            self.outbound_coalesced[lane] += len(messages) - 1
+    
+    def outbound_stats(self):
+        """Renvoie la profondeur et le délai d'envoi de chaque voie"""
+        with self.outbound_cond:
+            return {
+                name: {
+                    'depth': len(self.outbound_lanes[lane]),
+                    'sent': self.outbound_sent[lane],
+                    'avg_delay_ms': (self.outbound_delay_total[lane] / self.outbound_sent[lane]) * 1000
+                                    if self.outbound_sent[lane] else 0.0,
+                    'max_delay_ms': self.outbound_delay_max[lane] * 1000,
+                    'coalesced': self.outbound_coalesced[lane]
+                }
+                for lane, name in enumerate(LANE_NAMES)
+            }
+    
+    def connected(self):
+        """Indique si le client est en jeu, /limbo parti en premier, et peut envoyer des messages"""
+        process = self.process
+        return self.session_ready and process is not None and process.poll() is None
+    
     def _send_raw_command(self, command):
         """Envoie une commande brute au client Minecraft"""
         if not self.process or self.process.poll() is not None:
@@ -196,48 +495,93 @@ class MinecraftClient:
             logger.error(f"Erreur lors de l'envoi de la commande: {e}")
             return False
     
-    def send_command(self, command):
+    def send_command(self, command, lane=LANE_SYSTEM):
         """Envoie une commande au client Minecraft"""
         # Préfixer avec /send si ce n'est pas déjà le cas
         if not command.startswith('/send'):
             command = f'/send {command}'
         
-        # Ajouter à la file d'attente
-        self.command_queue.put(command)
+        # Ajouter à la file d'envoi
+        with self.outbound_cond:
+            self.outbound_lanes[lane].append((command, time.perf_counter()))
+            self.outbound_cond.notify()
         return True
     
-    def send_chat_message(self, message):
+    def request(self, command, start, end, timeout):
+        """Envoie une commande et attend sa réponse
+        
+        start et end reconnaissent la première et la dernière ligne de la réponse : texte contenu
+        dans la ligne, regex ou fonction. Renvoie les lignes nettoyées de start à end inclus,
+        None si la réponse n'est pas complète après timeout secondes.
+        """
+        is_start = _line_matcher(start)
+        is_end = _line_matcher(end)
+        deadline = time.monotonic() + timeout
+        
+        with self.output_cond:
+            next_seq = self.output_seq
+        self.send_command(command)
+        
+        lines = None
+        with self.output_cond:
+            while True:
+                # Lignes arrivées depuis le dernier passage, celles sorties du tampon sont perdues
+                first_seq = self.output_seq - len(self.recent_output)
+                offset = max(next_seq - first_seq, 0)
+                for line in islice(self.recent_output, offset, None):
+                    if lines is None:
+                        if is_start(line):
+                            lines = [line]
+                            if is_end(line):
+                                return lines
+                    else:
+                        lines.append(line)
+                        if is_end(line):
+                            return lines
+                next_seq = self.output_seq
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Pas de réponse complète à {command} après {timeout}s")
+                    return None
+                self.output_cond.wait(remaining)
+    
+    def send_chat_message(self, message, lane=LANE_REPLY):
         """Envoie un message au chat de guilde"""
+        return self.send_chat_messages([message], lane)
+    
+    def send_chat_messages(self, messages, lane=LANE_REPLY):
+        """Envoie plusieurs messages au chat de guilde, regroupés sur le moins de lignes possible"""
+        # Retirer le préfixe /gc, il est remis sur chaque ligne
+        contents = [message[4:] if message.startswith('/gc ') else message for message in messages]
+        
+        # Diviser les messages trop longs sur les séparateurs plutôt qu'au milieu d'un mot
+        lines = pack_chat_lines(contents)
+        if not lines:
+            return False
+        
         with self.last_sent_lock:
-            self.last_sent_message = message
+            self.last_sent_message = f"/gc {lines[-1]}"
             self.retry_count = 0
         
-        # Garantir que le message commence par /gc
-        if not message.startswith('/gc '):
-            content = message
-            message = f"/gc {message}"
-        else:
-            content = message[4:]  # Retirer '/gc '
-        
-        # Diviser les messages trop longs
-        if len(content) > 92:  # Limite Minecraft
-            chunks = [content[i:i+92] for i in range(0, len(content), 92)]
-            for chunk in chunks:
-                self.send_command(f"/gc {chunk}")
-                time.sleep(0.1)
-        else:
-            self.send_command(message)
+        for line in lines:
+            self.send_command(f"/gc {line}", lane)
         
         return True
     
     def stop(self):
         """Arrête proprement le client Minecraft"""
+        self.running = False
         if not self.process:
             return
         
+        for name, stats in self.outbound_stats().items():
+            logger.info(f"Voie {name}: {stats['sent']} envoyés, {stats['depth']} en attente, "
+                        f"délai moyen {stats['avg_delay_ms']:.0f}ms, max {stats['max_delay_ms']:.0f}ms")
+        
         try:
-            # Envoyer la commande pour quitter
-            self.send_command('/quit')
+            # Envoyer la commande pour quitter, sans attendre la file d'envoi
+            self._send_raw_command('/send /quit')
             
             # Attendre la fin du processus
             try:
@@ -1,16 +1,84 @@
 import re
+import time
 import logging
 import threading
-from queue import Queue, Empty
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, Future
 
-from shared.timing_utils import log_execution_time
-from shared.shortcuts import ShortcutManager
-from minecraft_bot.stats import HypixelScraper
-from config.settings import BOT_USERNAME
+from shared.shortcuts import ShortcutManager, ShortcutError
+from minecraft_bot.stats import HypixelScraper, PlayerNotFoundError, UpstreamUnavailableError
+from minecraft_bot.profile import (
+    COMMAND_TO_TH_TEXT, STAT_ABBREVIATIONS, RATIO_STATS,
+    mode_for_command, resolve_stat, split_subcategories, format_value, format_age, render_stats_delta
+)
+from minecraft_bot.leaderboard import RosterStatsTable, LeaderboardRefresher
+from minecraft_bot.stats_history import StatsHistory
+from minecraft_bot.dispatcher import CommandRegistry, CommandError
+from minecraft_bot.scheduler import FairScheduler, LOCAL, CACHED, NETWORK, PRIORITY_NAMES
+from config.settings import (
+    BOT_USERNAME, SCRAPER_PREWARM, STATS_FETCH_WORKERS, COMMAND_JOB_WORKERS, COMMAND_RESERVED_WORKERS,
+    LEADERBOARD_SIZE, HISTORY_DB_FILE, CHAT_AGGREGATE_RESULTS, TIMING_PREFIX
+)
 
 
 logger = logging.getLogger('minecraft_bot.commands')
 
+# Argument patterns, compiled once for every chat line
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_]{3,16}$')
+ALIAS_PATTERN = re.compile(r'^[a-zA-Z0-9_]{1,16}$')
+SHORTCUT_NAME_PATTERN = re.compile(r'^\w+$')
+
+# Periods accepted by 'bw -delta', e.g. 12h, 1d, 2w
+PERIOD_PATTERN = re.compile(r'^(\d+)([hdw])$')
+PERIOD_SECONDS = {'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+def _is_subcategory(word):
+    """Tells whether a stats argument names a subcategory: all, lvl, a stat or combined stats like fkdrFinals"""
+    if word in ('all', 'lvl'):
+        return True
+    parts = split_subcategories(word)
+    return bool(parts) and ''.join(parts) == word and all(resolve_stat(part) for part in parts)
+
+def _parse_user_shortcut(args, sender):
+    """usr shortcut <actual_username> [aliases...] | usr delete <alias> | usr list shortcut"""
+    if args.startswith('shortcut'):
+        parts = args.split()
+        if len(parts) < 2:
+            raise CommandError('Invalid format: usr shortcut <actual_username> [alias1] [alias2...]')
+        actual_username = parts[1]
+        aliases = parts[2:]
+        if not USERNAME_PATTERN.match(actual_username):
+            raise CommandError('Invalid actual username format')
+        if aliases:
+            return ('create', (actual_username, aliases))
+        return ('delete_all', actual_username)
+    elif args.startswith('delete'):
+        parts = args.split()
+        if len(parts) < 2:
+            raise CommandError('Invalid format: usr delete <alias>')
+        return ('delete', parts[1])
+    elif args == 'list shortcut':
+        return ('list', None)
+    return None
+
+def _parse_shortcut(args, sender):
+    """shortcut <name> <command> | shortcut <name>"""
+    if not args:
+        raise CommandError('Missing shortcut arguments')
+    
+    if ' ' in args:
+        shortcut_name, shortcut_command = args.split(' ', 1)
+        shortcut_name = shortcut_name.strip()
+        shortcut_command = shortcut_command.strip()
+        if not shortcut_name or not shortcut_command:
+            raise CommandError('Invalid format: shortcut <name> <command>')
+        return ('create', (shortcut_name, shortcut_command))
+    return ('delete', args)
+
+def _parse_list(args, sender):
+    """list shortcut"""
+    return sender if args == 'shortcut' else None
+
 class CommandHandler:
     """Handles commands received from Minecraft chat"""
     
@@ -18,98 +86,81 @@ class CommandHandler:
         self.minecraft_client = minecraft_client
         self.shortcut_manager = ShortcutManager()
         self.scraper = HypixelScraper()
-        self.stats_queue = Queue()
-        self.processing_thread = None
+        
+        self.commands = CommandRegistry()
+        self._register_commands()
+        
+        # Guild-wide leaderboard, kept up to date in the background
+        self.leaderboard = RosterStatsTable()
+        self.leaderboard_refresher = LeaderboardRefresher(self.scraper, self.leaderboard)
+        
+        # Every scraped profile is appended to the per-player history
+        self.history = StatsHistory(HISTORY_DB_FILE)
+        self.scraper.profile_listeners.append(self.history.record)
+        
+        # Runs command handlers off the chat intake thread, cheap ones first
+        self.scheduler = FairScheduler(COMMAND_JOB_WORKERS, COMMAND_RESERVED_WORKERS)
+        
+        # Fetches the uncached usernames of one request in parallel
+        self.fetch_pool = ThreadPoolExecutor(
+            max_workers=STATS_FETCH_WORKERS,
+            thread_name_prefix='stats-fetch'
+        )
     
     def start(self):
         """Starts command processing"""
-        self.processing_thread = threading.Thread(
-            target=self._process_stats_queue,
-            daemon=True
-        )
-        self.processing_thread.start()
+        self.leaderboard_refresher.start()
+        
+        # Open the plancke.io connection ahead of the first stats command
+        if SCRAPER_PREWARM:
+            threading.Thread(target=self.scraper.warm_up, daemon=True).start()
     
     def stop(self):
         """Stops command processing"""
-        if self.processing_thread:
-            self.stats_queue.put(None)  # Signal to stop the thread
+        self.leaderboard_refresher.stop()
+        self.scheduler.shutdown()
+        self.fetch_pool.shutdown(wait=False)
+        self.commands.log_stats()
+        self.scheduler.log_stats()
     
-    @log_execution_time("detect_command")
-    def detect_command_type(self, command, args, sender, recursion_depth=0):
-        """Determines the command type and extracts arguments"""
-        args = str(args).strip().replace("/", "")
-        MAX_RECURSION_DEPTH = 2
-        
-        if recursion_depth > MAX_RECURSION_DEPTH:
-            return ('error', 'Maximum shortcut nesting depth (2) exceeded')
-        
-        # Check for shortcuts at first level
-        if recursion_depth == 0:
-            shortcut_command = self.shortcut_manager.load_shortcut(sender, command)
-            if shortcut_command:
-                if shortcut_command.strip() == command:
-                    return ('error', f'Direct recursion in shortcut "{command}"')
-                
-                full_command = f"{shortcut_command} {args}".strip()
-                new_command, _, new_args = full_command.partition(' ')
-                return self.detect_command_type(new_command, new_args, sender, recursion_depth + 1)
-        
-        # User commands
-        if command == 'usr':
-            args = args.strip()
-            if args.startswith('shortcut'):
-                parts = args.split()
-                if len(parts) < 2:
-                    return ('error', 'Invalid format: usr shortcut <actual_username> [alias1] [alias2...]')
-                actual_username = parts[1]
-                aliases = parts[2:]
-                if not re.match(r'^[a-zA-Z0-9_]{3,16}$', actual_username):
-                    return ('error', 'Invalid actual username format')
-                if aliases:
-                    return ('user_shortcut_create', (actual_username, aliases))
-                else:
-                    return ('user_shortcut_delete_all', actual_username)
-            elif args.startswith('delete'):
-                parts = args.split()
-                if len(parts) < 2:
-                    return ('error', 'Invalid format: usr delete <alias>')
-                alias = parts[1]
-                return ('user_shortcut_delete', alias)
-            elif args == 'list shortcut':
-                return ('list_user_shortcuts', None)
-        
-        # Shortcut commands
-        if command == 'shortcut':
-            args = args.strip()
-            if not args:
-                return ('error', 'Missing shortcut arguments')
-            
-            if ' ' in args:
-                shortcut_name, shortcut_command = args.split(' ', 1)
-                shortcut_name = shortcut_name.strip()
-                shortcut_command = shortcut_command.strip()
-                if not shortcut_name or not shortcut_command:
-                    return ('error', 'Invalid format: shortcut <name> <command>')
-                return ('shortcut_create', (shortcut_name, shortcut_command))
-            else:
-                return ('shortcut_delete', args.strip())
-        
-        # List command
-        elif command == 'list':
-            if args.strip() == 'shortcut':
-                return ('list_shortcuts', sender)
-            return ('unknown', args)
-        
-        # Other command types
-        if command == 'g':
-            return ('guild', args)
-        elif command in ['1s', '2s', '3s', '4s', '4v4', 'core', 'bw']:
-            return ('gamemode_stat', args)
-        else:
-            return ('unknown', args)
+    def queue_stats(self):
+        """Returns the depth and wait times of every command priority class"""
+        return self.scheduler.stats()
+    
+    def _register_commands(self):
+        """Registers every chat command with its aliases, argument parser and handler"""
+        self.commands.register('usr', self._handle_user_shortcut, parse=_parse_user_shortcut, priority=LOCAL)
+        self.commands.register('shortcut', self._handle_shortcut, parse=_parse_shortcut, priority=LOCAL)
+        self.commands.register('list', self._handle_list, parse=_parse_list, priority=LOCAL)
+        self.commands.register('lb', self._handle_leaderboard, priority=LOCAL)
+        self.commands.register('g', self._handle_guild, parse=self._parse_guild_args, priority=self._guild_priority)
+        self.commands.register('bw', self._process_bedwars_stats, parse=self._parse_stats_args,
+                               aliases=('1s', '2s', '3s', '4s', '4v4', 'core'), priority=self._stats_priority)
+    
+    def _guild_priority(self, command, usernames):
+        return CACHED if all(self.scraper.is_cached(username, page=True) for username in usernames) else NETWORK
+    
+    def _stats_priority(self, command, command_args):
+        action, payload = command_args
+        if action == 'history':
+            return LOCAL
+        usernames = payload[0]
+        return CACHED if all(self.scraper.is_cached(username) for username in usernames) else NETWORK
+    
+    def detect_command_type(self, command, args, sender):
+        """Expands shortcuts and returns the registered command, the name typed and its arguments"""
+        args = str(args).strip()
+        
+        # Shortcuts are expanded once when saved, this is a single dict lookup
+        expansion = self.shortcut_manager.expand_shortcut(sender, command)
+        if expansion is not None:
+            command, shortcut_args = expansion
+            args = f"{shortcut_args} {args}".strip()
+        
+        return self.commands.lookup(command), command, args.replace("/", "")
     
     def process_command(self, channel, sender, message):
-        """Processes a command received from chat"""
+        """Parses a command received from chat and hands its handler to the scheduler"""
         if channel != "Guild" or sender == BOT_USERNAME:
             return False
         
@@ -118,96 +169,135 @@ class CommandHandler:
         if not parts:
             return False
         
+        start = time.perf_counter()
         command = parts[0]
         args = parts[1] if len(parts) > 1 else ""
         
         # Log for debugging
         logger.info(f"Processing command from {sender}: {message}")
-        logger.info(f"Extracted command: {command}, args: {args}")
         
-        # Detect command type
-        command_type, command_args = self.detect_command_type(command, args, sender)
-        logger.info(f"Command detected: {command_type}, command: {command}, args: {command_args}")
+        registered = None
+        try:
+            registered, command, args = self.detect_command_type(command, args, sender)
+            if registered is None:
+                logger.info(f"Unknown command: {command}, args: {args}")
+                return True
+            
+            command_args = registered.parse(args, sender) if registered.parse else args
+            if command_args is None:
+                logger.info(f"Unknown usage of {command}: {args}")
+                return True
         
-        # Handle error
-        if command_type == 'error':
-            self.minecraft_client.send_chat_message(f"Error: {command_args}")
+        except (CommandError, ShortcutError) as e:
+            if registered is not None:
+                self.commands.record(registered, time.perf_counter() - start, failed=True)
+            self.minecraft_client.send_chat_message(f"Error: {e}")
             return True
         
-        # Handle commands
-        if command_type == 'shortcut_create':
-            shortcut_name, shortcut_command = command_args
-            if not re.match(r'^\w+$', shortcut_name):
+        priority = registered.priority(command, command_args) if callable(registered.priority) else registered.priority
+        logger.info(f"Command detected: {registered.name} ({PRIORITY_NAMES[priority]}), command: {command}, "
+                    f"args: {command_args}")
+        future = self.scheduler.submit(priority, sender, self._run_job, registered, command, command_args, sender, start)
+        future.add_done_callback(lambda done: self._job_done(registered, sender, done))
+        
+        self.commands.record_intake(registered, time.perf_counter() - start)
+        return True
+    
+    def _run_job(self, registered, command, command_args, sender, submitted_at):
+        """Runs a command handler on a job thread"""
+        waited = time.perf_counter() - submitted_at
+        with self.commands.timed(registered):
+            registered.handler(command, command_args, sender)
+        logger.info(f"{TIMING_PREFIX}Command {registered.name} from {sender} done in "
+                    f"{(time.perf_counter() - submitted_at)*1000:.2f}ms (waited {waited*1000:.2f}ms)")
+    
+    def _job_done(self, registered, sender, future):
+        """Completion callback of a command job"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Error running command {registered.name} from {sender}: {error}", exc_info=error)
+    
+    def _handle_shortcut(self, command, command_args, sender):
+        action, payload = command_args
+        if action == 'create':
+            shortcut_name, shortcut_command = payload
+            if not SHORTCUT_NAME_PATTERN.match(shortcut_name):
                 self.minecraft_client.send_chat_message(f"Invalid shortcut name. Use letters/numbers only.")
             else:
-                self.shortcut_manager.save_shortcut(sender, shortcut_name, shortcut_command)
+                try:
+                    self.shortcut_manager.save_shortcut(sender, shortcut_name, shortcut_command)
+                except ShortcutError as e:
+                    self.minecraft_client.send_chat_message(f"Error: {e}")
+                    return
                 self.minecraft_client.send_chat_message(f"Shortcut '{shortcut_name}' created: {shortcut_command}")
         
-        elif command_type == 'shortcut_delete':
-            shortcut_name = command_args
+        elif action == 'delete':
+            shortcut_name = payload
             if self.shortcut_manager.delete_shortcut(sender, shortcut_name):
                 self.minecraft_client.send_chat_message(f"Shortcut '{shortcut_name}' deleted for {sender}")
             else:
                 self.minecraft_client.send_chat_message(f"Shortcut '{shortcut_name}' not found for {sender}")
-        
-        elif command_type == 'list_shortcuts':
-            shortcuts = self.shortcut_manager.list_shortcuts(sender)
-            if shortcuts:
-                for shortcut_name, shortcut_command in shortcuts.items():
-                    self.minecraft_client.send_chat_message(f"{shortcut_name}: {shortcut_command}")
-            else:
-                self.minecraft_client.send_chat_message(f"No shortcuts found for {sender}")
-        
-        elif command_type == 'user_shortcut_create':
-            actual_username, aliases = command_args
-            invalid_aliases = [a for a in aliases if not re.match(r'^[a-zA-Z0-9_]{1,16}$', a)]
+    
+    def _handle_list(self, command, command_args, sender):
+        shortcuts = self.shortcut_manager.list_shortcuts(sender)
+        if shortcuts:
+            for shortcut_name, shortcut_command in shortcuts.items():
+                self.minecraft_client.send_chat_message(f"{shortcut_name}: {shortcut_command}")
+        else:
+            self.minecraft_client.send_chat_message(f"No shortcuts found for {sender}")
+    
+    def _handle_user_shortcut(self, command, command_args, sender):
+        action, payload = command_args
+        if action == 'create':
+            actual_username, aliases = payload
+            invalid_aliases = [a for a in aliases if not ALIAS_PATTERN.match(a)]
             if invalid_aliases:
                 self.minecraft_client.send_chat_message(f"Invalid alias format: {', '.join(invalid_aliases)}")
             else:
                 self.shortcut_manager.save_user_shortcut(sender, actual_username, aliases)
                 self.minecraft_client.send_chat_message(f"Created username shortcuts: {', '.join(aliases)} → {actual_username}")
         
-        elif command_type == 'user_shortcut_delete':
-            alias = command_args
+        elif action == 'delete':
+            alias = payload
             if self.shortcut_manager.delete_user_shortcut(sender, alias):
                 self.minecraft_client.send_chat_message(f"Deleted username shortcut: {alias}")
             else:
                 self.minecraft_client.send_chat_message(f"Shortcut '{alias}' not found")
         
-        elif command_type == 'user_shortcut_delete_all':
-            actual_username = command_args
+        elif action == 'delete_all':
+            actual_username = payload
             if self.shortcut_manager.delete_all_user_shortcuts(sender, actual_username):
                 self.minecraft_client.send_chat_message(f"Deleted all shortcuts for username: {actual_username}")
             else:
                 self.minecraft_client.send_chat_message(f"No shortcuts found for username: {actual_username}")
         
-        elif command_type == 'list_user_shortcuts':
+        elif action == 'list':
             shortcuts = self.shortcut_manager.load_user_shortcuts(sender)
             if shortcuts:
                 for alias, actual in shortcuts.items():
                     self.minecraft_client.send_chat_message(f"{alias} → {actual}")
             else:
                 self.minecraft_client.send_chat_message(f"No username shortcuts found")
-        
-        elif command_type == 'guild':
-            # Process guild info requests
-            usernames = self._extract_usernames(command_args, sender)
-            for username in usernames:
-                # Resolve any alias
-                resolved_username = self.shortcut_manager.resolve_username(sender, username)
-                # Queue guild info request
-                self._process_guild_info(resolved_username)
-        
-        elif command_type == 'gamemode_stat':
-            # Process BedWars stats requests
-            self._process_bedwars_stats(command, command_args, sender)
-        
-        return True
+    
+    def _parse_guild_args(self, args, sender):
+        """g [usernames...], aliases resolved"""
+        return [
+            self.shortcut_manager.resolve_username(sender, username)
+            for username in self._extract_usernames(args, sender)
+        ]
+    
+    def _handle_guild(self, command, command_args, sender):
+        self._process_guild_info(command_args)
+    
+    def _handle_leaderboard(self, command, command_args, sender):
+        self._process_leaderboard(command_args)
     
     def _extract_usernames(self, args, default_sender):
         """Extracts valid usernames from command arguments"""
         components = args.split()
-        usernames = [arg for arg in components if re.match(r'^[a-zA-Z0-9_]{3,16}$', arg)]
+        usernames = [arg for arg in components if USERNAME_PATTERN.match(arg)]
         
         # If no valid usernames, use sender
         if not usernames:
@@ -215,32 +305,68 @@ class CommandHandler:
             
         return usernames
     
-    def _process_guild_info(self, username):
-        """Gets and sends guild info for a player"""
-        result = self.scraper.get_guild_info(username)
-        if result:
-            self.minecraft_client.send_chat_message(f"{result}")
+    def _process_leaderboard(self, args):
+        """Sends the guild leaderboard for a stat: lb <stat> [mode]"""
+        components = args.split()
+        if not components:
+            self.minecraft_client.send_chat_message("Usage: lb <stat> [1s|2s|3s|4s|4v4|core]")
+            return
+        
+        stat = 'lvl' if components[0].lower() in ('lvl', 'level') else resolve_stat(components[0])
+        if stat is None:
+            self.minecraft_client.send_chat_message(f"Unknown stat '{components[0]}'")
+            return
+        
+        mode_command = components[1].lower() if len(components) > 1 else 'bw'
+        if mode_command not in COMMAND_TO_TH_TEXT:
+            self.minecraft_client.send_chat_message(f"Unknown mode '{components[1]}'")
+            return
+        mode = mode_for_command(mode_command)
+        
+        top = self.leaderboard.top(stat, mode, LEADERBOARD_SIZE)
+        if not top:
+            self.minecraft_client.send_chat_message("No leaderboard data yet.")
+            return
+        
+        title = 'Level' if stat == 'lvl' else STAT_ABBREVIATIONS[stat]
+        entries = [
+            f"{rank}. {username} {format_value(value, stat in RATIO_STATS)}"
+            for rank, (username, value) in enumerate(top, 1)
+        ]
+        self.minecraft_client.send_chat_message(f"Top {title} ({mode}): {' ┃ '.join(entries)}")
+    
+    def _process_guild_info(self, usernames):
+        """Gets and sends guild info for players, fetched in parallel"""
+        futures = self._fan_out(
+            usernames, lambda username: self.scraper.is_cached(username, page=True), self.scraper.get_guild_info
+        )
+        self._send_results(future.result() for future in futures)
     
-    def _process_bedwars_stats(self, command, args, sender):
-        """Queues BedWars stats requests for processing in separate thread"""
+    def _parse_stats_args(self, args, sender):
+        """bw [-session|-delta <period>] | bw [top] [subcategory] [usernames...], aliases resolved"""
         components = args.split()
         top_flag = False
         subcategory = None
         
+        # History queries are answered from stored snapshots, the dash keeps
+        # players named 'session' or 'delta' reachable
+        if components and components[0] in ('-session', '-delta'):
+            return ('history', components)
+        
         # Check for 'top' flag
         if "top" in components:
             top_flag = True
             components.remove("top")
         
-        # Extract subcategory if present
-        if components and components[0] not in ['all', 'lvl'] and not re.match(r'^[a-zA-Z0-9_]{3,16}$', components[0]):
+        # Extract subcategory if present, stat names win over the username pattern they also match
+        if components and (_is_subcategory(components[0]) or not USERNAME_PATTERN.match(components[0])):
             subcategory = components[0]
             components = components[1:]
         else:
             subcategory = 'all'  # Default
         
         # Get usernames
-        usernames = [comp for comp in components if re.match(r'^[a-zA-Z0-9_]{3,16}$', comp)]
+        usernames = [comp for comp in components if USERNAME_PATTERN.match(comp)]
         if not usernames:
             usernames = [sender]
         
@@ -250,63 +376,140 @@ class CommandHandler:
             resolved_username = self.shortcut_manager.resolve_username(sender, username)
             resolved_usernames.append(resolved_username)
         
-        # Queue for processing
-        self.stats_queue.put((command, resolved_usernames, top_flag, subcategory))
+        return ('stats', (resolved_usernames, top_flag, subcategory))
+    
+    def _process_bedwars_stats(self, command, command_args, sender):
+        """Sends BedWars stats, runs on a job thread"""
+        action, payload = command_args
+        if action == 'history':
+            self._process_history(command, payload, sender)
+            return
+        
+        usernames, top_flag, subcategory = payload
+        if top_flag:
+            self._process_top_stats(command, usernames, subcategory)
+        else:
+            self._process_stats(command, usernames, subcategory)
+    
+    def _process_history(self, command, components, sender):
+        """Sends stats gained today (-session) or over a period (-delta <period>)"""
+        if components[0] == '-session':
+            since = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+            label = "today"
+            rest = components[1:]
+        else:
+            match = PERIOD_PATTERN.match(components[1]) if len(components) > 1 else None
+            if not match:
+                self.minecraft_client.send_chat_message("Usage: bw -delta <period: 12h, 1d, 2w> [username]")
+                return
+            since = time.time() - int(match.group(1)) * PERIOD_SECONDS[match.group(2)]
+            label = components[1]
+            rest = components[2:]
+        
+        usernames = [comp for comp in rest if USERNAME_PATTERN.match(comp)] or [sender]
+        mode = mode_for_command(command)
+        
+        results = []
+        for username in usernames:
+            username = self.shortcut_manager.resolve_username(sender, username)
+            latest = self.history.latest(username)
+            earlier = self.history.snapshot_at(username, since)
+            if latest is None or earlier is None or latest.fetched_at <= earlier.fetched_at:
+                results.append(f"Not enough history for {username} yet.")
+                continue
+            
+            # Snapshots rarely line up with the period, say what is really covered
+            covered = label
+            if earlier.fetched_at > since:
+                covered = f"last {format_age(latest.fetched_at - earlier.fetched_at)}"
+            
+            # A mode missing from either snapshot has no meaningful difference
+            if latest.mode(mode) is None or earlier.mode(mode) is None:
+                results.append(f"Not enough history for {username} in {mode} yet.")
+                continue
+            
+            delta = latest.mode(mode).delta(earlier.mode(mode))
+            results.append(render_stats_delta(username, covered, mode, delta))
+        
+        self._send_results(results)
+    
+    def _process_stats(self, command, usernames, subcategory):
+        """Sends the stats of every username, fetched in parallel"""
+        # Replies go out in the order the usernames were typed
+        self._send_results(future.result() for future in self._fetch_all(usernames, command, subcategory))
+    
+    def _send_results(self, results):
+        """Sends the per-player results of one command, packed into as few lines as possible"""
+        if not CHAT_AGGREGATE_RESULTS:
+            for result in results:
+                if result:
+                    self.minecraft_client.send_chat_message(result)
+            return
+        
+        results = [result for result in results if result]
+        if results:
+            self.minecraft_client.send_chat_messages(results)
     
-    def _process_stats_queue(self):
-        """Thread that processes queued stats requests"""
-        while True:
+    def _fan_out(self, usernames, is_cached, func, *args):
+        """Runs func(username, *args) for every username, returns the futures in the same order
+
+        Only uncached lookups of multi-name requests go to the shared fetch pool,
+        the others run on the job thread so the scheduler's priority and per-sender
+        fairness still decide when they run.
+        """
+        futures = [None] * len(usernames)
+        inline = []
+        for i, username in enumerate(usernames):
+            if len(usernames) == 1 or is_cached(username):
+                inline.append(i)
+            else:
+                futures[i] = self.fetch_pool.submit(func, username, *args)
+        
+        # Answered while the network lookups are in flight
+        for i in inline:
+            future = futures[i] = Future()
             try:
-                item = self.stats_queue.get(timeout=1.0)
-                if item is None:  # Stop signal
-                    break
-                
-                command, usernames, top_flag, subcategory = item
-                
-                if top_flag:
-                    self._process_top_stats(command, usernames, subcategory)
-                else:
-                    for username in usernames:
-                        result = self.scraper.get_bedwars_stats(username, command, subcategory)
-                        if result:
-                            self.minecraft_client.send_chat_message(result)
-                
-                self.stats_queue.task_done()
-                
-            except Empty:
-                # Queue is empty, continue waiting
-                pass
+                future.set_result(func(usernames[i], *args))
             except Exception as e:
-                logger.error(f"Error processing stats queue: {e}")
+                future.set_exception(e)
+        return futures
+    
+    def _fetch_all(self, usernames, command, subcategory):
+        """Starts one stats lookup per username, returns the futures in the same order"""
+        return self._fan_out(usernames, self.scraper.is_cached, self.scraper.get_bedwars_stats, command, subcategory)
     
     def _process_top_stats(self, command, usernames, subcategory):
         """Processes a 'top' request to find the player with the highest stat"""
         results = []
+        upstream_error = None
         
-        for username in usernames:
-            result = self.scraper.get_bedwars_stats(username, command, subcategory)
-            if result:
-                logger.info(f"Result for {username}: {result}")
-                
-                # Extract value based on subcategory
-                if subcategory == 'lvl':
-                    # Extract level from string like "[123✫] Username"
-                    level_pattern = r'\s(\d+(?:\.\d+)?)'
-                    level_match = re.search(level_pattern, result)
-                    if level_match:
-                        level_value = float(level_match.group(1))
-                        results.append((username, level_value))
-                else:
-                    # Find the stat value
-                    value_pattern = f"{subcategory}\\s+(\\d+(?:,\\d+)*(?:\\.\\d+)?)"
-                    value_match = re.search(value_pattern, result, re.IGNORECASE)
-                    if value_match:
-                        value_str = value_match.group(1).replace(',', '')
-                        try:
-                            value = float(value_str)
-                            results.append((username, value))
-                        except ValueError:
-                            logger.error(f"Could not convert '{value_str}' to float")
+        # Rank on the first stat of combined subcategories (e.g. 'fkdrFinals')
+        if subcategory == 'lvl':
+            stat = 'lvl'
+        else:
+            parts = split_subcategories(subcategory)
+            stat = resolve_stat(parts[0]) if parts else None
+        mode = mode_for_command(command)
+        
+        futures = self._fan_out(usernames, self.scraper.is_cached, self.scraper.get_bedwars_profile)
+        for username, future in zip(usernames, futures):
+            try:
+                profile = future.result()
+            except PlayerNotFoundError:
+                logger.info(f"Player {username} not found, skipped from top")
+                continue
+            except UpstreamUnavailableError as e:
+                logger.warning(f"Error getting BedWars profile for {username}: {e}")
+                upstream_error = e
+                continue
+            except Exception as e:
+                logger.error(f"Error getting BedWars profile for {username}: {e}")
+                continue
+            
+            value = profile.stat(mode, stat) if stat else None
+            logger.info(f"Result for {username}: {value}")
+            if value is not None:
+                results.append((username, float(value)))
         
         # Find the highest value
         if results:
@@ -319,6 +522,8 @@ class CommandHandler:
             self.minecraft_client.send_chat_message(
                 f"{top_user[0]} - {subcategory.capitalize()}: {value_str}"
             )
+        elif upstream_error:
+            self.minecraft_client.send_chat_message(upstream_error.chat_message())
         else:
             self.minecraft_client.send_chat_message(
                 "No results found to determine the top user."
@@ -0,0 +1,115 @@
+import time
+import logging
+import threading
+
+from minecraft_bot.scheduler import NETWORK
+
+logger = logging.getLogger('minecraft_bot.dispatcher')
+
+class CommandError(Exception):
+    """Invalid command arguments, the message is sent back to chat"""
+
+class Command:
+    """A registered chat command with its invocation statistics"""
+
+    __slots__ = ('name', 'aliases', 'parse', 'handler', 'priority', 'calls', 'errors', 'total_time',
+                 'max_time', 'intake_total', 'intake_max')
+
+    def __init__(self, name, handler, parse=None, aliases=(), priority=NETWORK):
+        self.name = name
+        self.aliases = tuple(aliases)
+        # parse(args, sender) returns the handler's arguments, None for an unknown usage
+        self.parse = parse
+        # handler(command, parsed_args, sender), command being the name or alias typed
+        self.handler = handler
+        # Scheduler priority class, or priority(command, parsed_args) deciding per invocation
+        self.priority = priority
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        # Time spent on the chat intake thread before the handler was handed off
+        self.intake_total = 0.0
+        self.intake_max = 0.0
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'avg_ms': (self.total_time / self.calls) * 1000 if self.calls else 0.0,
+            'max_ms': self.max_time * 1000,
+            'avg_intake_ms': (self.intake_total / self.calls) * 1000 if self.calls else 0.0,
+            'max_intake_ms': self.intake_max * 1000
+        }
+
+class CommandRegistry:
+    """Maps every command name and alias to its Command in a single dict"""
+
+    def __init__(self):
+        self._commands = {}
+        self._lookup = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, handler, parse=None, aliases=(), priority=NETWORK):
+        """Registers a command under its name and aliases"""
+        command = Command(name, handler, parse, aliases, priority)
+        for key in (name, *command.aliases):
+            if key in self._lookup:
+                raise ValueError(f"Command '{key}' is already registered")
+            self._lookup[key] = command
+        self._commands[name] = command
+        return command
+
+    def lookup(self, name):
+        """Returns the Command for a typed name or alias, None if unknown"""
+        return self._lookup.get(name)
+
+    def record(self, command, elapsed, failed=False):
+        """Records one invocation of a command"""
+        with self._lock:
+            command.calls += 1
+            if failed:
+                command.errors += 1
+            command.total_time += elapsed
+            if elapsed > command.max_time:
+                command.max_time = elapsed
+
+    def record_intake(self, command, elapsed):
+        """Records the intake time of one invocation"""
+        with self._lock:
+            command.intake_total += elapsed
+            if elapsed > command.intake_max:
+                command.intake_max = elapsed
+
+    def stats(self):
+        """Returns the invocation counts and latencies of every command"""
+        with self._lock:
+            return {name: command.stats() for name, command in self._commands.items()}
+
+    def log_stats(self):
+        """Logs the commands invoked so far"""
+        for name, stats in self.stats().items():
+            if stats['calls']:
+                logger.info(f"Command {name}: {stats['calls']} calls, {stats['errors']} errors, "
+                            f"avg {stats['avg_ms']:.2f}ms, max {stats['max_ms']:.2f}ms, "
+                            f"intake avg {stats['avg_intake_ms']:.3f}ms, max {stats['max_intake_ms']:.3f}ms")
+
+    def timed(self, command):
+        """Context manager recording the duration of one invocation"""
+        return _Invocation(self, command)
+
+class _Invocation:
+    __slots__ = ('registry', 'command', 'start')
+
+    def __init__(self, registry, command):
+        self.registry = registry
+        self.command = command
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.record(self.command, time.perf_counter() - self.start, exc_type is not None)
+        return False
@@ -0,0 +1,196 @@
+import re
+import logging
+import threading
+from queue import Queue, Empty, Full
+
+from config.settings import EVENT_QUEUE_SIZE
+
+logger = logging.getLogger('minecraft_bot.events')
+
+TIMESTAMP_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\s+')
+COLOR_CODE_PATTERN = re.compile(r'§.')
+CHAT_PATTERN = re.compile(
+    r'^(?P<channel>Guild|Officer)\s*>\s*'
+    r'(?:\[.*?\]\s*)?'
+    r'(?P<sender>.*?)\s*(?:\[.*?\])?\s*:\s*'
+    r'(?P<message>.*)$'
+)
+SENDER_TAG_PATTERN = re.compile(r'\s*\[.*?\]\s*')
+CONNECTION_LOST_PATTERN = re.compile(r'^(Connection has been lost\.|Login failed :)')
+GUILD_NAME_PATTERN = re.compile(r'Guild Name: (.+)')
+GUILD_SECTION_PATTERN = re.compile(r'-- (.+) --')
+RANK_PATTERN = re.compile(r'\[(.*?)\]')
+
+class GuildChatEvent:
+    """Message posted in guild or officer chat"""
+
+    __slots__ = ('channel', 'sender', 'message', 'line')
+
+    def __init__(self, channel, sender, message, line):
+        self.channel = channel
+        self.sender = sender
+        self.message = message
+        self.line = line
+
+class ServerJoinedEvent:
+    """The client joined the server"""
+
+    __slots__ = ('line',)
+
+    def __init__(self, line):
+        self.line = line
+
+class ConnectionLostEvent:
+    """The client lost its connection or failed to log in"""
+
+    __slots__ = ('reason', 'line')
+
+    def __init__(self, reason, line):
+        self.reason = reason
+        self.line = line
+
+class DuplicateMessageEvent:
+    """Hypixel refused a message identical to the previous one"""
+
+    __slots__ = ('line',)
+
+    def __init__(self, line):
+        self.line = line
+
+def parse_guild_online(lines):
+    """Extracts the guild name, usernames and ranks from the lines of a /g online answer"""
+    members = []
+    current_guild_rank = None
+    guild_name = None
+
+    for line in lines:
+        # Check for the guild name
+        name_match = GUILD_NAME_PATTERN.search(line)
+        if name_match:
+            guild_name = name_match.group(1).strip()
+            continue
+
+        # Check for section headers
+        section_match = GUILD_SECTION_PATTERN.search(line)
+        if section_match:
+            current_guild_rank = section_match.group(1).strip()
+            continue
+
+        # Members are separated by "●", the last part holds no player
+        if "●" in line:
+            for part in line.split("●")[:-1]:
+                clean_part = part.strip()
+                rank = None
+                username = clean_part
+
+                if "[" in clean_part:
+                    rank_match = RANK_PATTERN.search(clean_part)
+                    if rank_match:
+                        rank = rank_match.group(1)
+                        username = clean_part.split("]")[-1]
+
+                username = username.strip()
+                if username:
+                    members.append({
+                        'username': username,
+                        'rank': rank if rank else "",
+                        'guild_rank': current_guild_rank
+                    })
+
+    return guild_name, members
+
+def clean_line(line):
+    """Removes the timestamp and Minecraft color codes of an output line"""
+    return COLOR_CODE_PATTERN.sub('', TIMESTAMP_PATTERN.sub('', line, count=1)).strip()
+
+class LineClassifier:
+    """Turns client output lines into events, once per line
+
+    /g online answers are read back with MinecraftClient.request(), not published.
+    """
+
+    def feed(self, line):
+        """Returns the event for a line, None if the line isn't one"""
+        text = clean_line(line)
+        if not text:
+            return None
+
+        if "[MCC] Server was successfully joined." in text:
+            return ServerJoinedEvent(line)
+
+        if "You cannot say the same message twice!" in text:
+            return DuplicateMessageEvent(line)
+
+        match = CONNECTION_LOST_PATTERN.match(text)
+        if match:
+            return ConnectionLostEvent(match.group(1), line)
+
+        match = CHAT_PATTERN.match(text)
+        if match:
+            sender = SENDER_TAG_PATTERN.sub('', match.group('sender')).strip()
+            return GuildChatEvent(match.group('channel'), sender, match.group('message').strip(), line)
+
+        return None
+
+class Subscription:
+    """Bounded queue of the events a consumer subscribed to"""
+
+    __slots__ = ('name', 'event_types', 'queue', 'dropped')
+
+    def __init__(self, name, event_types, maxsize):
+        self.name = name
+        self.event_types = event_types
+        self.queue = Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def get(self, timeout=None):
+        """Returns the next event, None after the timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+    def clear(self):
+        """Drops the events already queued"""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except Empty:
+                return
+
+class EventBus:
+    """In-process publish/subscribe of client events"""
+
+    def __init__(self):
+        self._subscriptions = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_types, name, maxsize=EVENT_QUEUE_SIZE):
+        """Returns a subscription receiving the events of the given types"""
+        subscription = Subscription(name, tuple(event_types), maxsize)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def publish(self, event):
+        """Hands an event to every interested subscriber, dropping their oldest event when full"""
+        for subscription in self._subscriptions:
+            if not isinstance(event, subscription.event_types):
+                continue
+            while True:
+                try:
+                    subscription.queue.put_nowait(event)
+                    break
+                except Full:
+                    try:
+                        subscription.queue.get_nowait()
+                    except Empty:
+                        pass
+                    subscription.dropped += 1
+                    if subscription.dropped % 100 == 1:
+                        logger.warning(f"Subscriber {subscription.name} is lagging, "
+                                       f"{subscription.dropped} events dropped")
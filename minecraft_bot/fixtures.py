@@ -0,0 +1,90 @@
+import io
+import os
+import json
+import logging
+import requests
+
+from config.settings import FIXTURES_DIR
+
+logger = logging.getLogger('minecraft_bot.fixtures')
+
+INDEX_FILE = "index.json"
+
+class Fixture:
+    """Recorded plancke.io response for one player"""
+
+    __slots__ = ('label', 'username', 'status_code', 'content', 'note')
+
+    def __init__(self, label, username, status_code, content, note=""):
+        self.label = label
+        self.username = username
+        self.status_code = status_code
+        self.content = content
+        self.note = note
+
+def _load_index(directory):
+    index_path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def record_fixture(session, base_url, label, username, note="", directory=FIXTURES_DIR):
+    """Fetches a live player page and saves it as a fixture"""
+    os.makedirs(directory, exist_ok=True)
+
+    response = session.get(f"{base_url}/hypixel/player/stats/{username}", timeout=(5, 30))
+    file_name = f"{label}.html"
+    with open(os.path.join(directory, file_name), 'wb') as file:
+        file.write(response.content)
+
+    index = _load_index(directory)
+    index[label] = {
+        'username': username,
+        'status_code': response.status_code,
+        'file': file_name,
+        'note': note
+    }
+    with open(os.path.join(directory, INDEX_FILE), 'w', encoding='utf-8') as file:
+        json.dump(index, file, indent=4)
+
+    logger.info(f"Recorded fixture '{label}' for {username}: HTTP {response.status_code}, "
+                f"{len(response.content)} bytes")
+    return index[label]
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """Loads every recorded fixture of a directory"""
+    fixtures = []
+    for label, entry in _load_index(directory).items():
+        with open(os.path.join(directory, entry['file']), 'rb') as file:
+            content = file.read()
+        fixtures.append(Fixture(label, entry['username'], entry['status_code'], content, entry.get('note', "")))
+    return fixtures
+
+class ReplaySession:
+    """Stand-in for the scraper's requests.Session that answers from recorded fixtures"""
+
+    def __init__(self, fixtures):
+        self.fixtures = {fixture.username.lower(): fixture for fixture in fixtures}
+        self.requests = 0
+
+    def _response(self, url, status_code, body):
+        response = requests.Response()
+        response.url = url
+        response.status_code = status_code
+        response.headers['Content-Length'] = str(len(body))
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.raw = io.BytesIO(body)
+        return response
+
+    def get(self, url, **kwargs):
+        """Returns the recorded response for the player in the URL, 404 if none"""
+        self.requests += 1
+        username = url.split('#', 1)[0].rstrip('/').rsplit('/', 1)[-1].lower()
+        fixture = self.fixtures.get(username)
+        if fixture is None:
+            return self._response(url, 404, b'')
+        return self._response(url, fixture.status_code, fixture.content)
+
+    def head(self, url, **kwargs):
+        return self._response(url, 200, b'')
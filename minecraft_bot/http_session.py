@@ -0,0 +1,67 @@
+import threading
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger('minecraft_bot.http_session')
+
+# Only advertise brotli when urllib3 is able to decode it
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+
+# Handshake duration of the last connection opened by the current thread
+_handshake = threading.local()
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that records how long TCP+TLS setup took"""
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _handshake.elapsed = time.perf_counter() - start
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """Keep-alive adapter whose HTTPS connections report their handshake time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': HTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+def create_session(pool_size):
+    """Creates a pooled keep-alive session with compression negotiation"""
+    session = requests.Session()
+    adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive'
+    })
+    return session
+
+def reset_handshake_time():
+    """Clears the handshake time recorded for the current thread"""
+    _handshake.elapsed = 0.0
+
+def get_handshake_time():
+    """Returns the handshake time of the current thread's last request (0 if reused)"""
+    return getattr(_handshake, 'elapsed', 0.0)
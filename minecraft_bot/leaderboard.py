@@ -0,0 +1,189 @@
+import time
+import math
+import heapq
+import logging
+import threading
+from array import array
+
+from minecraft_bot.profile import STAT_ABBREVIATIONS
+from minecraft_bot.stats import BEDWARS_MODES
+from config.settings import LEADERBOARD_REFRESH_INTERVAL, LEADERBOARD_MAX_AGE, ROSTER_MAX_ABSENCE
+
+logger = logging.getLogger('minecraft_bot.leaderboard')
+
+# Level doesn't depend on the mode, it gets a single column
+LEVEL_COLUMN = (None, 'lvl')
+
+class RosterStatsTable:
+    """Column-wise table of every roster member's BedWars stats, for cheap top-k queries"""
+
+    def __init__(self):
+        self.names = []
+        self.rows = {}
+        # Lowercased guild members, profiles of anyone else are ignored
+        self.members = set()
+        # One float column per (mode, stat), NaN where unavailable
+        self.columns = {LEVEL_COLUMN: array('d')}
+        for mode in BEDWARS_MODES:
+            for stat in STAT_ABBREVIATIONS:
+                self.columns[(mode, stat)] = array('d')
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.names)
+
+    def _row(self, username):
+        """Returns the row of a player, appending one if needed"""
+        key = username.lower()
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.names)
+            self.rows[key] = row
+            self.names.append(username)
+            for column in self.columns.values():
+                column.append(math.nan)
+        return row
+
+    def admit(self, usernames):
+        """Marks players as guild members, returns the ones that weren't yet"""
+        with self.lock:
+            new = [username for username in usernames if username.lower() not in self.members]
+            self.members.update(username.lower() for username in new)
+            return new
+
+    def retain(self, usernames):
+        """Keeps only these players as guild members, the others drop out of top()"""
+        members = {username.lower() for username in usernames}
+        with self.lock:
+            self.members = members
+
+    def update(self, username, profile):
+        """Writes the stats of a profile into the player's row, if the player is a guild member"""
+        with self.lock:
+            if username.lower() not in self.members:
+                return
+            row = self._row(username)
+            # Keep a properly cased name over a lowercased one
+            if username != username.lower():
+                self.names[row] = username
+
+            self.columns[LEVEL_COLUMN][row] = math.nan if profile.level is None else profile.level
+            for mode in BEDWARS_MODES:
+                mode_stats = profile.mode(mode)
+                for stat in STAT_ABBREVIATIONS:
+                    value = getattr(mode_stats, stat) if mode_stats is not None else None
+                    self.columns[(mode, stat)][row] = math.nan if value is None else value
+
+    def set_display_name(self, username):
+        """Updates the displayed casing of a known player"""
+        with self.lock:
+            row = self.rows.get(username.lower())
+            if row is not None:
+                self.names[row] = username
+
+    def top(self, stat, mode, k):
+        """Returns the k best (username, value) pairs for a stat in a mode"""
+        column_key = LEVEL_COLUMN if stat == 'lvl' else (mode, stat)
+        with self.lock:
+            column = self.columns.get(column_key)
+            if column is None:
+                return []
+            # Rows of players who left the guild stay in place but are skipped
+            best = heapq.nlargest(
+                k,
+                (row for row in range(len(column))
+                 if not math.isnan(column[row]) and self.names[row].lower() in self.members),
+                key=column.__getitem__
+            )
+            return [(self.names[row], column[row]) for row in best]
+
+class LeaderboardRefresher:
+    """Keeps the roster stats table filled and slowly refreshes it in the background"""
+
+    def __init__(self, scraper, table):
+        self.scraper = scraper
+        self.table = table
+        self.running = False
+        self.thread = None
+
+        # Every successful scrape also lands in the table
+        self.scraper.profile_listeners.append(self.table.update)
+
+    def load(self):
+        """Fills the table from the stored profiles"""
+        start = time.perf_counter()
+        roster = self._current_roster()
+        self.table.admit(roster)
+        for username, profile in self.scraper.get_store().load_all_profiles():
+            self.table.update(username, profile)
+        for username in roster:
+            self.table.set_display_name(username)
+        logger.info(f"Leaderboard loaded {len(self.table)} players in {(time.perf_counter() - start)*1000:.2f}ms")
+
+    def add_members(self, usernames):
+        """Records guild members seen online so they join the leaderboard"""
+        self.scraper.get_store().add_roster_members(usernames, time.time())
+        
+        # Profiles stored before the player was seen in the guild join the table now
+        for username in self.table.admit(usernames):
+            profile = self.scraper.get_store().load_profile(username)
+            if profile is not None:
+                self.table.update(username, profile)
+        for username in usernames:
+            self.table.set_display_name(username)
+
+    def start(self):
+        """Starts the background refresh"""
+        if self.running:
+            return
+
+        self.running = True
+        self.load()
+        self.thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self.thread.start()
+        logger.info("Leaderboard refresher started")
+
+    def stop(self):
+        """Stops the background refresh"""
+        self.running = False
+        logger.info("Leaderboard refresher stopped")
+
+    def _current_roster(self):
+        """Returns the members seen in /g online recently enough to still count as in the guild"""
+        return self.scraper.get_store().load_roster(time.time() - ROSTER_MAX_ABSENCE)
+    
+    def _next_stale_member(self):
+        """Returns the roster member with the oldest (or missing) stats, None if all are fresh"""
+        ages = self.scraper.get_store().profile_ages()
+        now = time.time()
+        oldest = None
+        oldest_fetched_at = None
+        roster = self._current_roster()
+        # Members not seen for too long leave the leaderboard
+        self.table.retain(roster)
+        for username in roster:
+            fetched_at = ages.get(username.lower(), 0.0)
+            if now - fetched_at < LEADERBOARD_MAX_AGE or self.scraper.is_known_missing(username):
+                continue
+            if oldest is None or fetched_at < oldest_fetched_at:
+                oldest, oldest_fetched_at = username, fetched_at
+        return oldest
+
+    def _refresh_loop(self):
+        """Refreshes one stale member per interval, never while chat commands are being served"""
+        while self.running:
+            time.sleep(LEADERBOARD_REFRESH_INTERVAL)
+            if not self.running:
+                break
+            if self.scraper.interactive_in_flight() > 0:
+                continue
+
+            try:
+                username = self._next_stale_member()
+                if username is None:
+                    continue
+                if self.scraper.refresh_profile(username) is not None:
+                    logger.info(f"Leaderboard refreshed stats for {username}")
+            except Exception as e:
+                logger.error(f"Error refreshing leaderboard: {e}")
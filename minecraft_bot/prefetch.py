@@ -0,0 +1,83 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+from config.settings import PREFETCH_MIN_INTERVAL, PREFETCH_QUEUE_SIZE
+
+logger = logging.getLogger('minecraft_bot.prefetch')
+
+class StatsPrefetcher:
+    """Warms the scraper caches in the background for guild members who just came online"""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        # Pending usernames, deduplicated, oldest first
+        self.pending = OrderedDict()
+        self.pending_lock = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Starts the prefetch thread"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self.thread.start()
+        logger.info("Stats prefetcher started")
+
+    def stop(self):
+        """Stops the prefetch thread"""
+        with self.pending_lock:
+            self.running = False
+            self.pending_lock.notify_all()
+        logger.info("Stats prefetcher stopped")
+
+    def enqueue(self, usernames):
+        """Queues usernames for prefetching, dropping the oldest ones when full"""
+        with self.pending_lock:
+            for username in usernames:
+                self.pending[username.lower()] = username
+                self.pending.move_to_end(username.lower())
+                while len(self.pending) > PREFETCH_QUEUE_SIZE:
+                    self.pending.popitem(last=False)
+            self.pending_lock.notify()
+
+    def _next_username(self):
+        """Waits for the next username to prefetch, None when stopping"""
+        with self.pending_lock:
+            while self.running and not self.pending:
+                self.pending_lock.wait()
+            if not self.running:
+                return None
+            _, username = self.pending.popitem(last=False)
+            return username
+
+    def _wait_for_idle(self):
+        """Waits until no chat command lookup is running, so prefetch never competes with them"""
+        while self.running and self.scraper.interactive_in_flight() > 0:
+            time.sleep(0.5)
+
+    def _prefetch_loop(self):
+        """Prefetches one player at a time within the rate budget"""
+        while self.running:
+            username = self._next_username()
+            if username is None:
+                break
+
+            self._wait_for_idle()
+            if not self.running:
+                break
+
+            try:
+                if self.scraper.prefetch(username):
+                    logger.info(f"Prefetched stats for {username} "
+                                f"(prefetch hit ratio: {self.scraper.prefetch_hit_ratio():.0%}, "
+                                f"{self.scraper.prefetch_stats})")
+                    # Rate budget: at most one prefetch fetch per interval
+                    time.sleep(PREFETCH_MIN_INTERVAL)
+            except Exception as e:
+                logger.error(f"Error prefetching stats for {username}: {e}")
+                time.sleep(PREFETCH_MIN_INTERVAL)
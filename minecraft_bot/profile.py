@@ -0,0 +1,234 @@
+import re
+import time
+
+# Map command to table header text
+COMMAND_TO_TH_TEXT = {
+    'bw 1s': 'Solo',
+    'bw 2s': 'Doubles',
+    'bw 3s': '3v3v3v3',
+    'bw 4s': '4v4v4v4',
+    'bw 4v4': '4v4',
+    'bw core': 'Core Modes',
+    'bw': 'Overall',
+    '1s': 'Solo',
+    '2s': 'Doubles',
+    '3s': '3v3v3v3',
+    '4s': '4v4v4v4',
+    '4v4': '4v4',
+    'core': 'Core Modes'
+}
+
+# Mapping of stats to abbreviations
+STAT_ABBREVIATIONS = {
+    'kills': 'K',
+    'kd': 'KD',
+    'finals': 'F',
+    'fkdr': 'FKDR',
+    'wins': 'W',
+    'beds': 'B',
+    'wlr': 'WLR',
+    'bblr': 'BBLR'
+}
+
+# Abbreviations accepted in place of the full stat name
+STAT_ALIASES = {abbr.lower(): stat for stat, abbr in STAT_ABBREVIATIONS.items()}
+STAT_ALIASES.update({stat: stat for stat in STAT_ABBREVIATIONS})
+
+# Stats that are ratios rather than counters
+RATIO_STATS = ('kd', 'fkdr', 'wlr', 'bblr')
+
+_SUBCATEGORY_PATTERN = re.compile(r'[a-z]+|[A-Z][a-z]*')
+
+def mode_for_command(command):
+    """Returns the table header text for a stats command"""
+    return COMMAND_TO_TH_TEXT.get(command, 'Overall')
+
+def resolve_stat(name):
+    """Returns the canonical stat name for a name or abbreviation, or None"""
+    return STAT_ALIASES.get(name.lower())
+
+def split_subcategories(subcategory):
+    """Splits a combined subcategory such as 'fkdrFinals' into its parts"""
+    return _SUBCATEGORY_PATTERN.findall(subcategory)
+
+def _parse_count(text):
+    """Converts a table cell such as '1,234' to an int, None if unavailable"""
+    try:
+        return int(text.replace(',', ''))
+    except (AttributeError, ValueError):
+        return None
+
+def _ratio(numerator, denominator):
+    if numerator is None or not denominator:
+        return None
+    return numerator / denominator
+
+class ModeStats:
+    """Numeric BedWars stats for one mode row"""
+
+    __slots__ = ('kills', 'deaths', 'finals', 'final_deaths', 'wins', 'losses', 'beds')
+
+    def __init__(self, kills=None, deaths=None, finals=None, final_deaths=None,
+                 wins=None, losses=None, beds=None):
+        self.kills = kills
+        self.deaths = deaths
+        self.finals = finals
+        self.final_deaths = final_deaths
+        self.wins = wins
+        self.losses = losses
+        self.beds = beds
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Builds the stats from the <td> texts of a mode row"""
+        if len(cells) < 10:
+            return None
+        return cls(
+            kills=_parse_count(cells[0]),
+            deaths=_parse_count(cells[1]),
+            finals=_parse_count(cells[3]),
+            final_deaths=_parse_count(cells[4]),
+            wins=_parse_count(cells[6]),
+            losses=_parse_count(cells[7]),
+            beds=_parse_count(cells[9])
+        )
+
+    def to_list(self):
+        """Returns the counters in slot order, for storage"""
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def from_list(cls, values):
+        """Builds the stats from counters in slot order"""
+        return cls(*values)
+
+    def delta(self, earlier):
+        """Returns the counters gained since an earlier snapshot of the same mode"""
+        return ModeStats(*[
+            None if now is None or before is None else now - before
+            for now, before in zip(self.to_list(), earlier.to_list())
+        ])
+
+    @property
+    def kd(self):
+        return _ratio(self.kills, self.deaths)
+
+    @property
+    def fkdr(self):
+        return _ratio(self.finals, self.final_deaths)
+
+    @property
+    def wlr(self):
+        return _ratio(self.wins, self.losses)
+
+    @property
+    def bblr(self):
+        # Beds broken per game lost
+        return _ratio(self.beds, self.losses)
+
+    def get(self, stat):
+        """Returns the value of a stat by name or abbreviation, None if unavailable"""
+        stat = resolve_stat(stat)
+        if stat is None:
+            return None
+        return getattr(self, stat)
+
+class BedwarsProfile:
+    """Parsed BedWars profile of a player, with every mode row"""
+
+    __slots__ = ('level', 'modes', 'fetched_at')
+
+    def __init__(self, level=None, modes=None, fetched_at=None):
+        self.level = level
+        self.modes = modes if modes is not None else {}
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+    def age(self):
+        """Returns the number of seconds since the profile was scraped"""
+        return max(time.time() - self.fetched_at, 0)
+
+    def to_dict(self):
+        """Returns a JSON-serializable representation of the profile"""
+        return {
+            'level': self.level,
+            'modes': {name: stats.to_list() for name, stats in self.modes.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data, fetched_at):
+        """Builds a profile from its to_dict() representation"""
+        modes = {name: ModeStats.from_list(values) for name, values in data.get('modes', {}).items()}
+        return cls(data.get('level'), modes, fetched_at)
+
+    def mode(self, mode_name):
+        """Returns the stats of a mode (table header text), None if missing"""
+        return self.modes.get(mode_name)
+
+    def stat(self, mode_name, stat):
+        """Returns a numeric stat for a mode, or the level for 'lvl'"""
+        if stat == 'lvl':
+            return self.level
+        mode_stats = self.modes.get(mode_name)
+        if mode_stats is None:
+            return None
+        return mode_stats.get(stat)
+
+def format_value(value, ratio=False):
+    """Formats a stat value for chat"""
+    if value is None:
+        return "N/A"
+    if ratio:
+        return f"{value:.2f}"
+    if isinstance(value, float) and not value.is_integer():
+        return f"{value:.2f}"
+    return f"{int(value):,}"
+
+def format_age(seconds):
+    """Formats an age in seconds as a short duration (45s, 12m, 3h, 2d)"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    if seconds < 86400:
+        return f"{seconds // 3600}h"
+    return f"{seconds // 86400}d"
+
+def render_bedwars_stats(profile, username, game_mode, subcategory, show_age_after=None):
+    """Formats BedWars stats of a profile for chat, with its age if older than show_age_after"""
+    level_number = "N/A" if profile.level is None else f"{profile.level:g}"
+
+    age_suffix = ""
+    if show_age_after is not None and profile.age() > show_age_after:
+        age_suffix = f" ┃ {format_age(profile.age())} old"
+
+    if subcategory == 'lvl':
+        return f"[{level_number}✫] {username}{age_suffix}"
+
+    mode_stats = profile.mode(mode_for_command(game_mode)) or ModeStats()
+
+    if subcategory == 'all':
+        stats = list(STAT_ABBREVIATIONS)
+    else:
+        # Handle multiple subcategories (e.g., 'fkdrFinals')
+        stats = split_subcategories(subcategory)
+
+    results = []
+    for sc in stats:
+        stat = resolve_stat(sc)
+        if stat is None:
+            results.append(f"{sc.upper()} N/A")
+            continue
+        value = getattr(mode_stats, stat)
+        results.append(f"{STAT_ABBREVIATIONS[stat]} {format_value(value, stat in RATIO_STATS)}")
+
+    return f"[{level_number}✫] {username} ┃ {' ┃ '.join(results)}{age_suffix}"
+
+def render_stats_delta(username, label, mode, delta):
+    """Formats the stats gained over a period for chat"""
+    def gained(value):
+        return "N/A" if value is None else f"{value:+,}"
+
+    return (f"{username} ({label}, {mode}) ┃ F {gained(delta.finals)} ┃ "
+            f"FKDR {format_value(delta.fkdr, True)} ┃ K {gained(delta.kills)} ┃ "
+            f"W {gained(delta.wins)} ┃ WLR {format_value(delta.wlr, True)} ┃ B {gained(delta.beds)}")
@@ -9,6 +9,7 @@ from flask import Flask, request, jsonify
 from config.settings import FLASK_HOST, FLASK_PORT
 from config.credentials import DISCORD_WEBHOOK_URL, DISCORD_WEBHOOK_URL_ONLINE, WEBHOOK_SECRET
 from config.settings import COLOR_MAPPING
+from minecraft_bot.client import LANE_RELAY
 
 logger = logging.getLogger('minecraft_bot.relay')
 
@@ -141,14 +142,8 @@ class MinecraftDiscordRelay:
                 # Format the message
                 formatted_message = f'[DC] {username}: {content}'
                 
-                # Send to Minecraft
-                if len(formatted_message) > 90:  # Minecraft limit
-                    chunks = [formatted_message[i:i+90] for i in range(0, len(formatted_message), 90)]
-                    for chunk in chunks:
-                        self.minecraft_client.send_chat_message(chunk)
-                        time.sleep(0.5)  # Prevent spam
-                else:
-                    self.minecraft_client.send_chat_message(formatted_message)
+                # Send to Minecraft, the client splits long messages and paces the relay lane
+                self.minecraft_client.send_chat_message(formatted_message, LANE_RELAY)
                 
                 self.discord_queue.task_done()
                 
@@ -0,0 +1,125 @@
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+logger = logging.getLogger('minecraft_bot.scheduler')
+
+# Priority classes, lower runs first
+LOCAL = 0     # answered from memory or local files
+CACHED = 1    # scraper lookups already in cache
+NETWORK = 2   # needs plancke.io
+PRIORITY_NAMES = ('local', 'cached', 'network')
+
+class FairScheduler:
+    """Runs jobs by priority class, round-robin between senders within a class
+
+    Reserved workers only take local and cached jobs, so cheap commands keep
+    a thread even when every other worker is waiting on plancke.io.
+    """
+
+    def __init__(self, workers, reserved_workers=1, name='command-job'):
+        self._cond = threading.Condition()
+        # One queue per sender in each class, senders rotate in insertion order
+        self._classes = [OrderedDict() for _ in PRIORITY_NAMES]
+        self._depth = [0] * len(PRIORITY_NAMES)
+        self._served = [0] * len(PRIORITY_NAMES)
+        self._wait_total = [0.0] * len(PRIORITY_NAMES)
+        self._wait_max = [0.0] * len(PRIORITY_NAMES)
+        self._running = True
+
+        self._threads = []
+        for i in range(workers + reserved_workers):
+            max_priority = CACHED if i < reserved_workers else NETWORK
+            thread = threading.Thread(target=self._worker, args=(max_priority,), name=f"{name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, priority, sender, func, *args):
+        """Queues func(*args) for a sender, returns its Future"""
+        future = Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Scheduler is shut down")
+            senders = self._classes[priority]
+            jobs = senders.get(sender)
+            if jobs is None:
+                jobs = senders[sender] = deque()
+            jobs.append((future, func, args, time.perf_counter()))
+            self._depth[priority] += 1
+            self._cond.notify_all()
+        return future
+
+    def _take(self, max_priority):
+        """Pops the next job a worker may run, None if there is none (lock held)"""
+        for priority in range(max_priority + 1):
+            if not self._depth[priority]:
+                continue
+            senders = self._classes[priority]
+            sender, jobs = senders.popitem(last=False)
+            job = jobs.popleft()
+            if jobs:
+                # The sender goes back to the end of the rotation
+                senders[sender] = jobs
+            self._depth[priority] -= 1
+
+            waited = time.perf_counter() - job[3]
+            self._served[priority] += 1
+            self._wait_total[priority] += waited
+            if waited > self._wait_max[priority]:
+                self._wait_max[priority] = waited
+            return job
+        return None
+
+    def _worker(self, max_priority):
+        while True:
+            with self._cond:
+                job = self._take(max_priority)
+                while job is None and self._running:
+                    self._cond.wait()
+                    job = self._take(max_priority)
+                if job is None:
+                    return
+
+            future, func, args, _ = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        """Returns the queue depth and wait times of every priority class"""
+        with self._cond:
+            return {
+                name: {
+                    'depth': self._depth[priority],
+                    'served': self._served[priority],
+                    'avg_wait_ms': (self._wait_total[priority] / self._served[priority]) * 1000
+                                   if self._served[priority] else 0.0,
+                    'max_wait_ms': self._wait_max[priority] * 1000
+                }
+                for priority, name in enumerate(PRIORITY_NAMES)
+            }
+
+    def log_stats(self):
+        """Logs the wait times of every priority class"""
+        for name, stats in self.stats().items():
+            logger.info(f"Queue {name}: depth {stats['depth']}, {stats['served']} served, "
+                        f"wait avg {stats['avg_wait_ms']:.2f}ms, max {stats['max_wait_ms']:.2f}ms")
+
+    def shutdown(self):
+        """Stops the workers and cancels the jobs still queued"""
+        with self._cond:
+            self._running = False
+            pending = [job for senders in self._classes for jobs in senders.values() for job in jobs]
+            for senders in self._classes:
+                senders.clear()
+            self._depth = [0] * len(PRIORITY_NAMES)
+            self._cond.notify_all()
+        for future, _, _, _ in pending:
+            future.cancel()
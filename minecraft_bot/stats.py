@@ -1,61 +1,538 @@
 import re
 import logging
 import time
+import math
+import threading
 import requests
-from lxml import html
-from bs4 import BeautifulSoup
+from lxml import etree, html
 
 from shared.timing_utils import log_execution_time
+from shared.cache_utils import TTLCache, SingleFlight, BloomFilter
+from shared.rate_limit_utils import TokenBucket, CircuitBreaker, backoff_delay
+from minecraft_bot.profile import BedwarsProfile, ModeStats, render_bedwars_stats
+from minecraft_bot.stats_store import StatsStore
+from minecraft_bot.http_session import create_session, reset_handshake_time, get_handshake_time
+from config.settings import (
+    SCRAPER_PAGE_CACHE_TTL, SCRAPER_PAGE_CACHE_SIZE, SCRAPER_PROFILE_CACHE_TTL,
+    SCRAPER_PROFILE_CACHE_SIZE, SCRAPER_BASE_URL,
+    SCRAPER_CONNECT_TIMEOUT, SCRAPER_READ_TIMEOUT, SCRAPER_POOL_SIZE,
+    SCRAPER_MAX_CONCURRENCY_PER_HOST, SCRAPER_STREAMING_FETCH, SCRAPER_STREAM_CHUNK_SIZE,
+    SCRAPER_STREAM_MIN_SKIP, SCRAPER_NEGATIVE_CACHE_TTL, SCRAPER_NEGATIVE_CACHE_SIZE,
+    SCRAPER_UNKNOWN_BLOOM_CAPACITY, SCRAPER_UNKNOWN_BLOOM_ERROR_RATE, SCRAPER_UNKNOWN_BLOOM_MAX_AGE,
+    UNKNOWN_PLAYERS_FILE,
+    STATS_DB_FILE, STATS_STORE_FRESH_AGE, STATS_STORE_MAX_AGE, SCRAPER_RATE_LIMIT,
+    SCRAPER_RATE_BURST, SCRAPER_RATE_MIN, SCRAPER_RATE_INCREASE, SCRAPER_RATE_WAIT_TIMEOUT,
+    SCRAPER_MAX_RETRIES, SCRAPER_RETRY_BASE_DELAY, SCRAPER_RETRY_MAX_DELAY,
+    SCRAPER_BREAKER_WINDOW, SCRAPER_BREAKER_MIN_CALLS, SCRAPER_BREAKER_FAILURE_RATIO,
+    SCRAPER_BREAKER_SLOW_CALL, SCRAPER_BREAKER_OPEN_DURATION, TIMING_PREFIX
+)
 
 logger = logging.getLogger('minecraft_bot.stats')
 
+# Rows of the BedWars table, by table header text
+BEDWARS_MODES = ('Solo', 'Doubles', '3v3v3v3', '4v4v4v4', '4v4', 'Core Modes', 'Overall')
+
+# Valid Minecraft usernames, anything else can't have a page
+_USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_]{3,16}$')
+
+# XPath expressions compiled once at import
+_PLAYER_NAME_XPATH = etree.XPath('//*[@id="wrapper"]/div[3]/div/div/div[2]/div[1]/div[1]/div/span')
+_GUILD_HEADER_XPATH = etree.XPath('//h4[text()="Guild"]')
+# Level entries and mode row headers, in document order, so the page is walked once
+_BEDWARS_NODES_XPATH = etree.XPath('//li//b[contains(., "Level:")] | //th[@scope="row"]')
+
+# Page cache key suffix of pages cut after the BedWars table, only good for stats parsing
+_STATS_ONLY_SUFFIX = '#stats'
+
+class _StatsRowsWatcher:
+    """Incremental parser that tells when every row needed from a page has been received"""
+    
+    def __init__(self):
+        self.parser = etree.HTMLPullParser(events=('end',), tag=('li', 'th'))
+        self.level_seen = False
+        self.modes_seen = set()
+    
+    def feed(self, chunk):
+        """Feeds a chunk of the page, returns True once the level and every mode row were seen"""
+        self.parser.feed(chunk)
+        for _, element in self.parser.read_events():
+            if element.tag == 'li':
+                if not self.level_seen:
+                    self.level_seen = any('Level:' in ''.join(b.itertext()) for b in element.iter('b'))
+            elif element.get('scope') == 'row':
+                mode = ''.join(element.itertext()).strip()
+                if mode in BEDWARS_MODES:
+                    self.modes_seen.add(mode)
+        return self.level_seen and len(self.modes_seen) == len(BEDWARS_MODES)
+    
+    def close(self):
+        try:
+            self.parser.close()
+        except etree.Error:
+            pass
+
+class PlayerNotFoundError(Exception):
+    """Raised when plancke.io has no page for a player"""
+
+class UpstreamUnavailableError(Exception):
+    """Raised when plancke.io keeps failing or the circuit breaker is open"""
+    
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+    
+    def chat_message(self):
+        """Message shown in chat instead of the stats"""
+        if self.retry_after > 0:
+            return f"plancke.io is unavailable right now, try again in {math.ceil(self.retry_after)}s"
+        return "plancke.io is unavailable right now, try again later"
+
+class _RetryableFetchError(Exception):
+    """A failed attempt worth retrying (429, 5xx, timeout, connection error)"""
+    
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 class HypixelScraper:
     """Web scraper for Hypixel player statistics from Plancke.io"""
     
+    # Player pages shared by every scraper method, keyed by lowercased username,
+    # pages cut after the BedWars table are kept apart under _STATS_ONLY_SUFFIX
+    page_cache = TTLCache(SCRAPER_PAGE_CACHE_SIZE, SCRAPER_PAGE_CACHE_TTL)
+    
+    # Parsed all-modes BedWars profiles, so mode/subcategory variants skip fetch and parse
+    profile_cache = TTLCache(SCRAPER_PROFILE_CACHE_SIZE, SCRAPER_PROFILE_CACHE_TTL)
+    
+    # Profiles persisted across restarts, read before going to the network, opened on first use
+    _store = None
+    _store_lock = threading.Lock()
+    
+    # Callables notified with (username, profile) after every successful scrape
+    profile_listeners = []
+    
+    # Players whose stale stored profile is being refreshed
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+    
+    # Players warmed by the prefetcher, to measure how many interactive lookups it served
+    _prefetched = TTLCache(SCRAPER_PROFILE_CACHE_SIZE, SCRAPER_PROFILE_CACHE_TTL)
+    prefetch_stats = {'prefetched': 0, 'lookups': 0, 'warm_hits': 0}
+    _interactive_active = 0
+    _activity_lock = threading.Lock()
+    
+    # Players that recently returned a 404
+    negative_cache = TTLCache(SCRAPER_NEGATIVE_CACHE_SIZE, SCRAPER_NEGATIVE_CACHE_TTL)
+    
+    # Names known not to exist, persisted across restarts, loaded on first use
+    unknown_players_file = UNKNOWN_PLAYERS_FILE
+    _unknown_players = None
+    _unknown_players_lock = threading.Lock()
+    
+    # Pooled keep-alive session, created on first use
+    _session = None
+    _session_lock = threading.Lock()
+    
+    # Concurrent lookups of one username share a single in-flight request
+    _in_flight = SingleFlight()
+    
+    # Caps simultaneous requests to plancke.io whatever the number of workers
+    _host_slots = threading.BoundedSemaphore(SCRAPER_MAX_CONCURRENCY_PER_HOST)
+    
+    # Upstream health: adaptive request rate and circuit breaker
+    rate_limiter = TokenBucket(SCRAPER_RATE_LIMIT, SCRAPER_RATE_BURST)
+    breaker = CircuitBreaker(
+        SCRAPER_BREAKER_WINDOW,
+        SCRAPER_BREAKER_MIN_CALLS,
+        SCRAPER_BREAKER_FAILURE_RATIO,
+        SCRAPER_BREAKER_SLOW_CALL,
+        SCRAPER_BREAKER_OPEN_DURATION
+    )
+    
+    # Streaming fetch counters
+    stream_stats = {'requests': 0, 'early_exits': 0, 'full_reads': 0, 'bytes_read': 0, 'bytes_saved': 0}
+    _stream_stats_lock = threading.Lock()
+    
+    @staticmethod
+    def _get_session():
+        """Returns the shared HTTP session"""
+        with HypixelScraper._session_lock:
+            if HypixelScraper._session is None:
+                HypixelScraper._session = create_session(SCRAPER_POOL_SIZE)
+            return HypixelScraper._session
+    
+    @staticmethod
+    def get_store():
+        """Returns the shared profile store"""
+        with HypixelScraper._store_lock:
+            if HypixelScraper._store is None:
+                HypixelScraper._store = StatsStore(STATS_DB_FILE)
+            return HypixelScraper._store
+    
+    @staticmethod
+    def _get_unknown_players():
+        """Returns the filter of names known not to exist"""
+        with HypixelScraper._unknown_players_lock:
+            if HypixelScraper._unknown_players is None:
+                HypixelScraper._unknown_players = BloomFilter.load(
+                    HypixelScraper.unknown_players_file,
+                    SCRAPER_UNKNOWN_BLOOM_CAPACITY,
+                    SCRAPER_UNKNOWN_BLOOM_ERROR_RATE,
+                    max_age=SCRAPER_UNKNOWN_BLOOM_MAX_AGE
+                )
+            return HypixelScraper._unknown_players
+    
+    @staticmethod
+    def warm_up():
+        """Opens a connection to plancke.io so the first command skips the handshake"""
+        try:
+            reset_handshake_time()
+            start = time.perf_counter()
+            response = HypixelScraper._get_session().head(
+                SCRAPER_BASE_URL,
+                timeout=(SCRAPER_CONNECT_TIMEOUT, SCRAPER_READ_TIMEOUT)
+            )
+            response.close()
+            logger.info(f"{TIMING_PREFIX}Scraper connection pre-warmed in {(time.perf_counter() - start)*1000:.2f}ms "
+                        f"(handshake: {get_handshake_time()*1000:.2f}ms)")
+            return True
+        except Exception as err:
+            logger.warning(f"Could not pre-warm scraper connection: {err}")
+            return False
+    
+    @staticmethod
+    def _fetch_page(username, full=True):
+        """Returns the raw player page, or None if the player doesn't exist
+
+        With full=False the page may stop after the BedWars table.
+        """
+        key = username.lower()
+        content = HypixelScraper.page_cache.get(key)
+        if content is None and not full:
+            content = HypixelScraper.page_cache.get(key + _STATS_ONLY_SUFFIX)
+        if content is not None:
+            logger.info(f"Page cache hit for {username} ({HypixelScraper.page_cache.stats()})")
+            return content
+        
+        if HypixelScraper.is_known_missing(username):
+            logger.info(f"Rejected lookup of unknown player {username} without fetching")
+            return None
+        
+        # Without streaming every download is a full page, stats and guild lookups share one key
+        if full or not SCRAPER_STREAMING_FETCH:
+            return HypixelScraper._in_flight.do(key, HypixelScraper._download_page, username, True)
+        
+        # A full page answers a stats lookup too, join a full download already under way
+        return HypixelScraper._in_flight.do(
+            key + _STATS_ONLY_SUFFIX, HypixelScraper._download_page, username, False, join_keys=(key,)
+        )
+    
+    @staticmethod
+    def is_known_missing(username):
+        """Tells whether a username is invalid or recently returned a 404"""
+        if not _USERNAME_PATTERN.match(username):
+            return True
+        key = username.lower()
+        return key in HypixelScraper.negative_cache or key in HypixelScraper._get_unknown_players()
+    
+    @staticmethod
+    def is_cached(username, page=False):
+        """Tells whether a lookup can be answered from memory, without reaching plancke.io"""
+        key = username.lower()
+        cache = HypixelScraper.page_cache if page else HypixelScraper.profile_cache
+        return key in cache or HypixelScraper.is_known_missing(username)
+    
+    @staticmethod
+    def _remember_missing(username):
+        """Records a 404 in the negative cache and the persisted filter"""
+        key = username.lower()
+        HypixelScraper.negative_cache.set(key, True)
+        unknown_players = HypixelScraper._get_unknown_players()
+        unknown_players.add(key)
+        unknown_players.save(HypixelScraper.unknown_players_file)
+    
+    @staticmethod
+    def _download_page(username, full=True):
+        """Downloads a player page and stores it in the page cache"""
+        key = username.lower()
+        
+        # Another caller may have completed the same download just before us
+        content = HypixelScraper.page_cache.get(key)
+        if content is None and not full:
+            content = HypixelScraper.page_cache.get(key + _STATS_ONLY_SUFFIX)
+        if content is not None:
+            return content
+        
+        attempt = 0
+        while True:
+            try:
+                content, truncated = HypixelScraper._request_page(username, stream=not full)
+                break
+            except _RetryableFetchError as err:
+                if attempt >= SCRAPER_MAX_RETRIES:
+                    raise UpstreamUnavailableError(
+                        f"plancke.io failed {attempt + 1} times for {username}: {err}",
+                        HypixelScraper.breaker.retry_after()
+                    )
+                delay = max(backoff_delay(attempt, SCRAPER_RETRY_BASE_DELAY, SCRAPER_RETRY_MAX_DELAY),
+                            min(err.retry_after, SCRAPER_RETRY_MAX_DELAY))
+                logger.warning(f"Request for {username} failed ({err}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+        
+        if content is not None:
+            HypixelScraper.page_cache.set(key + _STATS_ONLY_SUFFIX if truncated else key, content)
+        return content
+    
+    @staticmethod
+    def _request_page(username, stream=False):
+        """Makes one request for a player page, guarded by the rate limiter and circuit breaker
+
+        Returns (content, truncated), content being None for an unknown player.
+        """
+        # The breaker is checked first: with it open, waiting for a token would only delay the rejection
+        breaker = HypixelScraper.breaker
+        if not breaker.allow():
+            raise UpstreamUnavailableError(f"Circuit breaker open for {username}", breaker.retry_after())
+        
+        if not HypixelScraper.rate_limiter.acquire(timeout=SCRAPER_RATE_WAIT_TIMEOUT):
+            breaker.release()
+            raise UpstreamUnavailableError(f"Rate limit wait exceeded for {username}")
+        
+        # The #BedWars fragment never reaches the server, both commands share this page
+        url = f"{SCRAPER_BASE_URL}/hypixel/player/stats/{username}"
+        
+        # Every path must give the breaker an outcome, or a half-open trial never ends
+        recorded = False
+        try:
+            with HypixelScraper._host_slots:
+                reset_handshake_time()
+                start_req = time.perf_counter()
+                try:
+                    response = HypixelScraper._get_session().get(
+                        url,
+                        timeout=(SCRAPER_CONNECT_TIMEOUT, SCRAPER_READ_TIMEOUT),
+                        stream=True
+                    )
+                except requests.RequestException as err:
+                    recorded = True
+                    HypixelScraper._record_failure()
+                    raise _RetryableFetchError(str(err))
+                headers_time = time.perf_counter() - start_req
+                handshake_time = get_handshake_time()
+                
+                try:
+                    if response.status_code == 404:
+                        # Drain the body so the connection goes back to the pool
+                        response.content
+                        recorded = True
+                        breaker.record_success(time.perf_counter() - start_req)
+                        HypixelScraper._remember_missing(username)
+                        return None, False
+                    
+                    if response.status_code == 429 or response.status_code >= 500:
+                        recorded = True
+                        HypixelScraper._record_failure(throttled=response.status_code == 429)
+                        retry_after = response.headers.get('Retry-After', '')
+                        raise _RetryableFetchError(
+                            f"HTTP {response.status_code}",
+                            float(retry_after) if retry_after.isdigit() else 0.0
+                        )
+                    
+                    if response.status_code >= 400:
+                        # Other client errors don't say anything about upstream health
+                        recorded = True
+                        breaker.record_success(time.perf_counter() - start_req)
+                        response.raise_for_status()
+                    
+                    # Reading the body separately isolates the transfer time
+                    start_transfer = time.perf_counter()
+                    try:
+                        if stream and SCRAPER_STREAMING_FETCH:
+                            content, truncated = HypixelScraper._read_until_stats(response, username)
+                        else:
+                            content, truncated = response.content, False
+                    except requests.RequestException as err:
+                        recorded = True
+                        HypixelScraper._record_failure()
+                        raise _RetryableFetchError(str(err))
+                    transfer_time = time.perf_counter() - start_transfer
+                finally:
+                    response.close()
+            
+            recorded = True
+            breaker.record_success(time.perf_counter() - start_req)
+        except Exception:
+            if not recorded:
+                HypixelScraper._record_failure()
+            raise
+        
+        HypixelScraper._relax_rate()
+        
+        logger.info(f"{TIMING_PREFIX}Page request for {username}: "
+                    f"Handshake: {handshake_time*1000:.2f}ms, "
+                    f"Server: {(headers_time - handshake_time)*1000:.2f}ms, "
+                    f"Transfer: {transfer_time*1000:.2f}ms")
+        return content, truncated
+    
+    @staticmethod
+    def _record_failure(throttled=False):
+        """Feeds a failure to the circuit breaker, and slows down on 429"""
+        breaker = HypixelScraper.breaker
+        trips = breaker.trip_count
+        breaker.record_failure()
+        
+        if throttled:
+            limiter = HypixelScraper.rate_limiter
+            limiter.set_rate(max(limiter.rate / 2, SCRAPER_RATE_MIN))
+        
+        if breaker.trip_count != trips:
+            logger.warning(f"Circuit breaker tripped for plancke.io: {HypixelScraper.upstream_status()}")
+    
+    @staticmethod
+    def _relax_rate():
+        """Gradually restores the request rate after successful requests"""
+        limiter = HypixelScraper.rate_limiter
+        if limiter.rate < SCRAPER_RATE_LIMIT:
+            limiter.set_rate(min(limiter.rate + SCRAPER_RATE_INCREASE, SCRAPER_RATE_LIMIT))
+    
+    @staticmethod
+    def upstream_status():
+        """Returns the limiter and circuit breaker state for plancke.io"""
+        breaker = HypixelScraper.breaker
+        limiter = HypixelScraper.rate_limiter
+        return {
+            'state': breaker.state,
+            'trip_count': breaker.trip_count,
+            'retry_after': round(breaker.retry_after(), 1),
+            'tokens': round(limiter.tokens(), 2),
+            'rate': round(limiter.rate, 2)
+        }
+    
+    @staticmethod
+    def _read_until_stats(response, username):
+        """Reads a page chunk by chunk and drops the connection once the level and every mode row arrived
+
+        Dropping it costs a new handshake on the next request, so it only happens
+        when more than SCRAPER_STREAM_MIN_SKIP bytes are left, otherwise the page is
+        read to the end. Returns (content, truncated).
+        """
+        watcher = _StatsRowsWatcher()
+        chunks = []
+        stats_received = False
+        truncated = False
+        remaining = None
+        content_length = response.headers.get('Content-Length')
+        
+        try:
+            for chunk in response.iter_content(chunk_size=SCRAPER_STREAM_CHUNK_SIZE):
+                chunks.append(chunk)
+                if stats_received or not watcher.feed(chunk):
+                    continue
+                stats_received = True
+                # Bytes are counted on the wire (compressed), as announced by Content-Length
+                remaining = int(content_length) - response.raw.tell() if content_length else None
+                if remaining is not None and remaining > SCRAPER_STREAM_MIN_SKIP:
+                    # The caller closes the response, the rest is never downloaded
+                    truncated = True
+                    break
+        finally:
+            watcher.close()
+        
+        content = b''.join(chunks)
+        bytes_read = response.raw.tell()
+        bytes_saved = remaining if truncated else 0
+        
+        with HypixelScraper._stream_stats_lock:
+            stats = HypixelScraper.stream_stats
+            stats['requests'] += 1
+            stats['bytes_read'] += bytes_read
+            stats['bytes_saved'] += bytes_saved
+            if truncated:
+                stats['early_exits'] += 1
+            elif stats_received:
+                stats['full_reads'] += 1
+        
+        logger.info(f"Streaming fetch for {username}: read {bytes_read} bytes, "
+                    f"{f'dropped the connection before {bytes_saved} bytes' if truncated else 'read the whole page'}")
+        return content, truncated
+    
+    @staticmethod
+    def _begin_interactive(username, warm):
+        """Records the start of a lookup made for a chat command"""
+        with HypixelScraper._activity_lock:
+            HypixelScraper._interactive_active += 1
+            HypixelScraper.prefetch_stats['lookups'] += 1
+            if warm and username.lower() in HypixelScraper._prefetched:
+                HypixelScraper.prefetch_stats['warm_hits'] += 1
+    
+    @staticmethod
+    def _end_interactive():
+        with HypixelScraper._activity_lock:
+            HypixelScraper._interactive_active -= 1
+    
+    @staticmethod
+    def interactive_in_flight():
+        """Returns the number of chat command lookups currently running"""
+        with HypixelScraper._activity_lock:
+            return HypixelScraper._interactive_active
+    
+    @staticmethod
+    def prefetch_hit_ratio():
+        """Returns the share of interactive lookups served warm thanks to the prefetcher"""
+        with HypixelScraper._activity_lock:
+            lookups = HypixelScraper.prefetch_stats['lookups']
+            return HypixelScraper.prefetch_stats['warm_hits'] / lookups if lookups else 0.0
+    
+    @staticmethod
+    def prefetch(username):
+        """Warms the caches for a player, returns False if there was nothing to do"""
+        key = username.lower()
+        if key in HypixelScraper.profile_cache or HypixelScraper.is_known_missing(username):
+            return False
+        
+        try:
+            HypixelScraper._download_profile(username)
+        except PlayerNotFoundError:
+            return False
+        
+        HypixelScraper._prefetched.set(key, True)
+        with HypixelScraper._activity_lock:
+            HypixelScraper.prefetch_stats['prefetched'] += 1
+        return True
+    
+    @staticmethod
+    def refresh_profile(username):
+        """Scrapes a player again regardless of caches, returns None if the player doesn't exist"""
+        try:
+            return HypixelScraper._download_profile(username)
+        except PlayerNotFoundError:
+            return None
+    
     @staticmethod
     @log_execution_time("get_guild_info")
     def get_guild_info(username):
         """Gets guild information for a player"""
-        url = f"https://plancke.io/hypixel/player/stats/{username}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-        }
-
+        HypixelScraper._begin_interactive(username, username.lower() in HypixelScraper.page_cache)
+        try:
+            return HypixelScraper._get_guild_info(username)
+        finally:
+            HypixelScraper._end_interactive()
+    
+    @staticmethod
+    def _get_guild_info(username):
         try:
-            # HTTP request
+            # HTTP request (or page cache)
             start_req = time.perf_counter()
-            response = requests.get(url, headers=headers)
+            content = HypixelScraper._fetch_page(username)
             req_time = time.perf_counter() - start_req
 
-            if response.status_code == 404:
+            if content is None:
                 return f"Ran into an error! The player '{username}' doesn't appear to exist!"
 
-            response.raise_for_status()
-
             # HTML parsing
             start_parse = time.perf_counter()
-            tree = html.fromstring(response.content)
-            xpath = '//*[@id="wrapper"]/div[3]/div/div/div[2]/div[1]/div[1]/div/span'
-            span_elements = tree.xpath(xpath)
-
-            result_text = None
-            if span_elements:
-                last_span = span_elements[-1]
-                result_text = last_span.text_content().strip()
-                
-                # Look for guild name
-                h4_elements = tree.xpath('//h4[text()="Guild"]')
-                if h4_elements:
-                    h4_element = h4_elements[0]
-                    sibling_elements = h4_element.getparent().getchildren()
-                    for sibling in sibling_elements:
-                        if sibling.tag == 'a':
-                            guild_name = sibling.text_content().strip()
-                            if guild_name.lower() == "felony":
-                                guild_name += " #YUCKY"
-                            result_text = f"{result_text} - {guild_name}"
-                            break
-            
+            result_text = HypixelScraper._parse_guild_info(content)
             parse_time = time.perf_counter() - start_parse
             
             logger.info(f"Guild info request: {req_time*1000:.2f}ms, "
@@ -63,160 +540,181 @@ class HypixelScraper:
                         f"Total: {(time.perf_counter() - start_req)*1000:.2f}ms")
             
             return result_text
+        except UpstreamUnavailableError as err:
+            logger.warning(f"Error getting guild info: {err}")
+            return err.chat_message()
         except Exception as err:
             logger.error(f"Error getting guild info: {err}")
             return None
     
     @staticmethod
-    @log_execution_time("get_bedwars_stats")
-    def get_bedwars_stats(username, game_mode, subcategory):
-        """Gets BedWars statistics for a player"""
-        url = f"https://plancke.io/hypixel/player/stats/{username}#BedWars"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-        }
+    def _parse_guild_info(content):
+        """Extracts the displayed player name and guild from a player page"""
+        tree = html.fromstring(content)
+        span_elements = _PLAYER_NAME_XPATH(tree)
 
+        result_text = None
+        if span_elements:
+            last_span = span_elements[-1]
+            result_text = last_span.text_content().strip()
+            
+            # Look for guild name
+            h4_elements = _GUILD_HEADER_XPATH(tree)
+            if h4_elements:
+                h4_element = h4_elements[0]
+                sibling_elements = h4_element.getparent().getchildren()
+                for sibling in sibling_elements:
+                    if sibling.tag == 'a':
+                        guild_name = sibling.text_content().strip()
+                        if guild_name.lower() == "felony":
+                            guild_name += " #YUCKY"
+                        result_text = f"{result_text} - {guild_name}"
+                        break
+        
+        return result_text
+    
+    @staticmethod
+    @log_execution_time("get_bedwars_profile")
+    def get_bedwars_profile(username):
+        """Gets the parsed BedWars profile of a player, raises PlayerNotFoundError on 404"""
+        HypixelScraper._begin_interactive(username, username.lower() in HypixelScraper.profile_cache)
         try:
-            start_req = time.perf_counter()
-            response = requests.get(url, headers=headers)
-            req_time = time.perf_counter() - start_req
-
-            if response.status_code == 404:
-                return f"Ran into an error! The player '{username}' doesn't appear to exist!"
-
-            response.raise_for_status()
-
-            parse_start = time.perf_counter()
-            content = response.content
-            if content is None:
-                logger.error("Response content is None")
-                return None
+            return HypixelScraper._load_profile(username)
+        finally:
+            HypixelScraper._end_interactive()
+    
+    @staticmethod
+    def _load_profile(username):
+        key = username.lower()
+        start_req = time.perf_counter()
+        profile = HypixelScraper.profile_cache.get(key)
+        if profile is not None:
+            logger.info(f"{TIMING_PREFIX}Profile cache hit for {username} in "
+                        f"{(time.perf_counter() - start_req)*1e6:.0f}µs "
+                        f"({HypixelScraper.profile_cache.stats()})")
+            return profile
+        
+        stored = HypixelScraper.get_store().load_profile(key)
+        if stored is not None:
+            age = stored.age()
+            if age <= STATS_STORE_FRESH_AGE:
+                HypixelScraper.profile_cache.set(key, stored)
+                logger.info(f"{TIMING_PREFIX}Stored profile for {username} served in "
+                            f"{(time.perf_counter() - start_req)*1000:.2f}ms (age {age:.0f}s)")
+                return stored
+            if age <= STATS_STORE_MAX_AGE:
+                # Stale: answer now, refresh for the next lookup
+                logger.info(f"Serving stale profile for {username} (age {age:.0f}s), refreshing in background")
+                HypixelScraper._refresh_in_background(username)
+                return stored
+        
+        try:
+            return HypixelScraper._download_profile(username)
+        except PlayerNotFoundError:
+            raise
+        except Exception as err:
+            # plancke.io unreachable: an old answer beats no answer
+            if stored is not None:
+                logger.warning(f"Serving stored profile for {username} after fetch error: {err}")
+                return stored
+            raise
+    
+    @staticmethod
+    def _download_profile(username):
+        """Fetches and parses a profile, then caches and stores it"""
+        key = username.lower()
+        start_req = time.perf_counter()
+        content = HypixelScraper._fetch_page(username, full=False)
+        req_time = time.perf_counter() - start_req
 
-            soup = BeautifulSoup(content, 'html.parser')
-            parse_time = time.perf_counter() - parse_start
+        if content is None:
+            HypixelScraper.get_store().delete_profile(key)
+            raise PlayerNotFoundError(username)
 
-            stats = HypixelScraper._process_bedwars_soup(soup, username, game_mode, subcategory)
+        parse_start = time.perf_counter()
+        profile = HypixelScraper._parse_bedwars_profile(content)
+        parse_time = time.perf_counter() - parse_start
+        HypixelScraper.profile_cache.set(key, profile)
+        HypixelScraper.get_store().save_profile(key, profile)
+        
+        for listener in HypixelScraper.profile_listeners:
+            try:
+                listener(username, profile)
+            except Exception as err:
+                logger.error(f"Error in profile listener: {err}")
 
-            logger.info(f"BedWars stats request: "
-                        f"Request: {req_time*1000:.2f}ms, "
-                        f"Parsing: {parse_time*1000:.2f}ms, "
-                        f"Total: {(time.perf_counter() - start_req)*1000:.2f}ms")
+        logger.info(f"BedWars stats request: "
+                    f"Request: {req_time*1000:.2f}ms, "
+                    f"Parsing: {parse_time*1000:.2f}ms, "
+                    f"Total: {(time.perf_counter() - start_req)*1000:.2f}ms")
 
-            return stats
+        return profile
+    
+    @staticmethod
+    def _refresh_in_background(username):
+        """Refreshes a stale stored profile without blocking the caller"""
+        key = username.lower()
+        with HypixelScraper._refreshing_lock:
+            if key in HypixelScraper._refreshing:
+                return
+            HypixelScraper._refreshing.add(key)
+        
+        def refresh():
+            try:
+                HypixelScraper._download_profile(username)
+            except PlayerNotFoundError:
+                logger.info(f"Player {username} no longer exists, removed from store")
+            except Exception as err:
+                logger.warning(f"Background refresh failed for {username}: {err}")
+            finally:
+                with HypixelScraper._refreshing_lock:
+                    HypixelScraper._refreshing.discard(key)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    @staticmethod
+    @log_execution_time("get_bedwars_stats")
+    def get_bedwars_stats(username, game_mode, subcategory):
+        """Gets BedWars statistics for a player, formatted for chat"""
+        try:
+            profile = HypixelScraper.get_bedwars_profile(username)
+            return render_bedwars_stats(profile, username, game_mode, subcategory,
+                                        show_age_after=STATS_STORE_FRESH_AGE)
+        except PlayerNotFoundError:
+            return f"Ran into an error! The player '{username}' doesn't appear to exist!"
+        except UpstreamUnavailableError as err:
+            logger.warning(f"Error getting BedWars stats: {err}")
+            return err.chat_message()
         except Exception as err:
             logger.error(f"Error getting BedWars stats: {err}")
             return None
     
     @staticmethod
-    @log_execution_time("process_bedwars_soup")
-    def _process_bedwars_soup(soup, username, game_mode, subcategory):
-        """Processes BeautifulSoup object to extract BedWars stats"""
-        # Find player level
-        level_tag = None
-        for li_tag in soup.find_all('li'):
-            b_tag = li_tag.find('b', string=lambda string: string and 'Level:' in string)
-            if b_tag:
-                level_tag = b_tag
-                break
-
-        if level_tag:
-            level_number = level_tag.next_sibling.strip()
-            level_number = ''.join(filter(lambda x: x.isdigit() or x == '.', level_number))
-        else:
-            level_number = "N/A"
-
-        if subcategory == 'lvl':
-            return f"[{level_number}✫] {username}"
-
-        # Mapping of stats to abbreviations
-        stat_abbreviations = {
-            'kills': 'K',
-            'kd': 'KD',
-            'finals': 'F',
-            'fkdr': 'FKDR',
-            'wins': 'W',
-            'beds': 'B',
-            'wlr': 'WLR',
-            'bblr': 'BBLR'
-        }
-
-        # Map command to table header text
-        command_to_th_text = {
-            'bw 1s': 'Solo',
-            'bw 2s': 'Doubles',
-            'bw 3s': '3v3v3v3',
-            'bw 4s': '4v4v4v4',
-            'bw 4v4': '4v4',
-            'bw core': 'Core Modes',
-            'bw': 'Overall',
-            '1s': 'Solo',
-            '2s': 'Doubles',
-            '3s': '3v3v3v3',
-            '4s': '4v4v4v4',
-            '4v4': '4v4',
-            'core': 'Core Modes'
-        }
-
-        # Find the correct table row for the game mode
-        th_text = command_to_th_text.get(game_mode, 'Overall')
-        th_tag = soup.find('th', {'scope': 'row'}, string=th_text)
-        
-        if th_tag:
-            tr_tag = th_tag.find_parent('tr')
-            if tr_tag:
-                td_tags = tr_tag.find_all('td')
-                if len(td_tags) >= 10:
-                    # Extract all stats
-                    kills = td_tags[0].get_text(strip=True)
-                    kd = td_tags[2].get_text(strip=True)
-                    finals = td_tags[3].get_text(strip=True)
-                    fkdr = td_tags[5].get_text(strip=True)
-                    wins = td_tags[6].get_text(strip=True)
-                    wlr = td_tags[8].get_text(strip=True)
-                    losses = td_tags[7].get_text(strip=True)
-                    beds = td_tags[9].get_text(strip=True)
-
-                    # Calculate BBLR (Beds Broken/Lost Ratio)
+    @log_execution_time("parse_bedwars_profile")
+    def _parse_bedwars_profile(content):
+        """Extracts the level and every BedWars mode row from a player page in one pass"""
+        tree = html.fromstring(content)
+        level = None
+        level_found = False
+        modes = {}
+        
+        for node in _BEDWARS_NODES_XPATH(tree):
+            if node.tag == 'b':
+                # First "Level:" entry, the value is the text right after the tag
+                if not level_found:
+                    level_found = True
+                    level_text = ''.join(filter(lambda x: x.isdigit() or x == '.', node.tail or ''))
                     try:
-                        beds_num = float(beds.replace(',', '')) if beds != 'N/A' else 0
-                        losses_num = float(losses.replace(',', '')) if losses != 'N/A' else 0
-                        bblr = f"{beds_num/losses_num:.2f}" if losses_num != 0 else "N/A"
-                    except:
-                        bblr = "N/A"
-                else:
-                    kills = kd = finals = fkdr = wins = beds = wlr = losses = bblr = "N/A"
-            else:
-                kills = kd = finals = fkdr = wins = beds = wlr = bblr = "N/A"
-        else:
-            kills = kd = finals = fkdr = wins = beds = wlr = bblr = "N/A"
-
-        # Map subcategories to values
-        command_suffix_map = {
-            'kills': kills,
-            'kd': kd,
-            'finals': finals,
-            'fkdr': fkdr,
-            'wins': wins,
-            'beds': beds,
-            'wlr': wlr,
-            'bblr': bblr
-        }
-
-        # Format the response based on subcategory
-        if subcategory == 'all':
-            return (f"[{level_number}✫] {username} ┃ {stat_abbreviations['kills']} {kills} ┃ "
-                    f"{stat_abbreviations['kd']} {kd} ┃ {stat_abbreviations['finals']} {finals} ┃ "
-                    f"{stat_abbreviations['fkdr']} {fkdr} ┃ {stat_abbreviations['wins']} {wins} ┃ "
-                    f"{stat_abbreviations['beds']} {beds} ┃ {stat_abbreviations['wlr']} {wlr} ┃ "
-                    f"{stat_abbreviations['bblr']} {bblr}")
-        else:
-            # Handle multiple subcategories (e.g., 'fkdrFinals')
-            subcategories_list = re.findall(r'[a-z]+|[A-Z][a-z]*', subcategory)
-            results = []
-            for sc in subcategories_list:
-                sc_lower = sc.lower()
-                variable = command_suffix_map.get(sc_lower, "N/A")
-                abbr = stat_abbreviations.get(sc_lower, sc.upper())
-                results.append(f"{abbr} {variable}")
+                        level = float(level_text)
+                    except ValueError:
+                        level = None
+                continue
             
-            return f"[{level_number}✫] {username} ┃ {' ┃ '.join(results)}"
\ No newline at end of file
+            mode = ''.join(node.itertext()).strip()
+            if mode in BEDWARS_MODES and mode not in modes:
+                cells = [''.join(td.itertext()).strip() for td in node.getparent().iterchildren('td')]
+                mode_stats = ModeStats.from_cells(cells)
+                if mode_stats is not None:
+                    modes[mode] = mode_stats
+        
+        return BedwarsProfile(level, modes)
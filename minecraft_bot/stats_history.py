@@ -0,0 +1,206 @@
+import time
+import logging
+import sqlite3
+import threading
+
+from minecraft_bot.profile import BedwarsProfile, ModeStats
+from minecraft_bot.stats import BEDWARS_MODES
+from config.settings import HISTORY_KEYFRAME_INTERVAL
+
+logger = logging.getLogger('minecraft_bot.stats_history')
+
+# Level is stored in hundredths so every value of a snapshot is an integer
+_LEVEL_SCALE = 100
+_FIELDS_PER_MODE = len(ModeStats.__slots__)
+# Each mode is stored as a presence flag followed by its counters
+_MODE_WIDTH = 1 + _FIELDS_PER_MODE
+_VECTOR_LENGTH = 1 + len(BEDWARS_MODES) * _MODE_WIDTH
+# Rows written before presence flags: no flag and None stored as 0
+_LEGACY_VECTOR_LENGTH = 1 + len(BEDWARS_MODES) * _FIELDS_PER_MODE
+
+def _zigzag_encode(value):
+    return (value << 1) ^ (value >> 63)
+
+def _zigzag_decode(value):
+    return (value >> 1) ^ -(value & 1)
+
+def _pack(values):
+    """Packs signed integers as zigzag varints"""
+    out = bytearray()
+    for value in values:
+        value = _zigzag_encode(value)
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+def _unpack(data):
+    """Unpacks zigzag varints packed by _pack"""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(_zigzag_decode(value))
+        value = shift = 0
+    return values
+
+# Known values are stored plus one, 0 stands for None
+def _encode_value(value):
+    return 0 if value is None else value + 1
+
+def _decode_value(value):
+    return None if value == 0 else value - 1
+
+def _profile_to_vector(profile):
+    """Flattens a profile into integers: level then, for every mode, its presence and counters"""
+    level = None if profile.level is None else round(profile.level * _LEVEL_SCALE)
+    vector = [_encode_value(level)]
+    for mode in BEDWARS_MODES:
+        mode_stats = profile.mode(mode)
+        if mode_stats is None:
+            vector.extend([0] * _MODE_WIDTH)
+        else:
+            vector.append(1)
+            vector.extend(_encode_value(value) for value in mode_stats.to_list())
+    return vector
+
+def _upgrade_legacy_vector(vector):
+    """Converts a vector written without presence flags, a mode with only zeros counts as missing"""
+    upgraded = [_encode_value(vector[0] or None)]
+    for i in range(len(BEDWARS_MODES)):
+        values = vector[1 + i * _FIELDS_PER_MODE:1 + (i + 1) * _FIELDS_PER_MODE]
+        if any(values):
+            upgraded.append(1)
+            upgraded.extend(_encode_value(value) for value in values)
+        else:
+            upgraded.extend([0] * _MODE_WIDTH)
+    return upgraded
+
+def _vector_to_profile(vector, fetched_at):
+    modes = {}
+    for i, mode in enumerate(BEDWARS_MODES):
+        start = 1 + i * _MODE_WIDTH
+        if vector[start]:
+            modes[mode] = ModeStats.from_list([_decode_value(value)
+                                               for value in vector[start + 1:start + _MODE_WIDTH]])
+    level = _decode_value(vector[0])
+    return BedwarsProfile(None if level is None else level / _LEVEL_SCALE, modes, fetched_at)
+
+# Rows hold zigzag varints: the full vector for keyframes, the difference with the
+# previous snapshot otherwise. A keyframe every HISTORY_KEYFRAME_INTERVAL rows bounds reads.
+class StatsHistory:
+    """Compact per-player time series of scraped profiles"""
+
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "username TEXT NOT NULL, "
+            "ts REAL NOT NULL, "
+            "keyframe INTEGER NOT NULL, "
+            "data BLOB NOT NULL, "
+            "PRIMARY KEY (username, ts)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+        # Last vector and rows since keyframe per player, avoids re-reading on append
+        self._last = {}
+
+    def _load_chain(self, key, until):
+        """Returns the rows from the last keyframe at or before 'until' up to 'until'"""
+        keyframe_ts = self._conn.execute(
+            "SELECT MAX(ts) FROM history WHERE username = ? AND keyframe = 1 AND ts <= ?",
+            (key, until)
+        ).fetchone()[0]
+        if keyframe_ts is None:
+            return []
+        return self._conn.execute(
+            "SELECT ts, keyframe, data FROM history WHERE username = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+            (key, keyframe_ts, until)
+        ).fetchall()
+
+    @staticmethod
+    def _replay(rows):
+        """Rebuilds the full vector of the last row of a keyframe chain"""
+        vector = None
+        for _, keyframe, data in rows:
+            values = _unpack(data)
+            if keyframe or vector is None:
+                vector = values
+            else:
+                vector = [a + b for a, b in zip(vector, values)]
+        return vector
+
+    def record(self, username, profile):
+        """Appends a snapshot of a profile, skipped when nothing changed"""
+        key = username.lower()
+        vector = _profile_to_vector(profile)
+
+        try:
+            with self._lock:
+                last = self._last.get(key)
+                if last is None:
+                    rows = self._load_chain(key, float('inf'))
+                    if rows:
+                        last = (self._replay(rows), len(rows) - 1)
+
+                if last is not None and last[0] == vector:
+                    return False
+
+                # A chain written before presence flags can't take deltas of the new layout
+                if last is not None and len(last[0]) != _VECTOR_LENGTH:
+                    last = None
+                if last is None or last[1] + 1 >= HISTORY_KEYFRAME_INTERVAL:
+                    keyframe, data, since_keyframe = 1, _pack(vector), 0
+                else:
+                    delta = [a - b for a, b in zip(vector, last[0])]
+                    keyframe, data, since_keyframe = 0, _pack(delta), last[1] + 1
+
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO history (username, ts, keyframe, data) VALUES (?, ?, ?, ?)",
+                    (key, profile.fetched_at, keyframe, data)
+                )
+                self._conn.commit()
+                self._last[key] = (vector, since_keyframe)
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error recording stats history for {username}: {e}")
+            return False
+
+    def snapshot_at(self, username, ts):
+        """Returns the last snapshot taken at or before ts, or the first one after it"""
+        key = username.lower()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT MAX(ts) FROM history WHERE username = ? AND ts <= ?", (key, ts)
+                ).fetchone()
+                target = row[0]
+                if target is None:
+                    target = self._conn.execute(
+                        "SELECT MIN(ts) FROM history WHERE username = ?", (key,)
+                    ).fetchone()[0]
+                if target is None:
+                    return None
+                rows = self._load_chain(key, target)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading stats history for {username}: {e}")
+            return None
+
+        vector = self._replay(rows)
+        if vector is None:
+            return None
+        if len(vector) == _LEGACY_VECTOR_LENGTH:
+            vector = _upgrade_legacy_vector(vector)
+        return _vector_to_profile(vector, target)
+
+    def latest(self, username):
+        """Returns the most recent snapshot of a player"""
+        return self.snapshot_at(username, time.time())
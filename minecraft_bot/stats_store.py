@@ -0,0 +1,136 @@
+import json
+import logging
+import sqlite3
+import threading
+
+from minecraft_bot.profile import BedwarsProfile
+
+logger = logging.getLogger('minecraft_bot.stats_store')
+
+class StatsStore:
+    """On-disk store of scraped BedWars profiles, kept across restarts"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "username TEXT PRIMARY KEY, "
+            "fetched_at REAL NOT NULL, "
+            "data TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS roster ("
+            "username_key TEXT PRIMARY KEY, "
+            "username TEXT NOT NULL, "
+            "last_seen REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load_profile(self, username):
+        """Returns the stored profile of a player, None if unknown"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT fetched_at, data FROM profiles WHERE username = ?",
+                    (username.lower(),)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error loading stored profile for {username}: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        fetched_at, data = row
+        return BedwarsProfile.from_dict(json.loads(data), fetched_at)
+
+    def save_profile(self, username, profile):
+        """Stores or replaces the profile of a player"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO profiles (username, fetched_at, data) VALUES (?, ?, ?)",
+                    (username.lower(), profile.fetched_at, json.dumps(profile.to_dict(), separators=(',', ':')))
+                )
+                self._conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error storing profile for {username}: {e}")
+            return False
+
+    def delete_profile(self, username):
+        """Removes a player from the store"""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM profiles WHERE username = ?", (username.lower(),))
+                self._conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting stored profile for {username}: {e}")
+            return False
+
+    def load_all_profiles(self):
+        """Returns every stored profile as (username, profile) pairs"""
+        try:
+            with self._lock:
+                rows = self._conn.execute("SELECT username, fetched_at, data FROM profiles").fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error loading stored profiles: {e}")
+            return []
+
+        return [(username, BedwarsProfile.from_dict(json.loads(data), fetched_at))
+                for username, fetched_at, data in rows]
+
+    def profile_ages(self):
+        """Returns the scrape time of every stored profile, by lowercased username"""
+        try:
+            with self._lock:
+                return dict(self._conn.execute("SELECT username, fetched_at FROM profiles").fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"Error loading stored profile ages: {e}")
+            return {}
+
+    def add_roster_members(self, usernames, seen_at):
+        """Records guild members, keeping the casing they were last seen with"""
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO roster (username_key, username, last_seen) VALUES (?, ?, ?)",
+                    [(username.lower(), username, seen_at) for username in usernames]
+                )
+                self._conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error storing roster members: {e}")
+            return False
+
+    def load_roster(self, seen_since=0.0):
+        """Returns the guild members seen online since the given time"""
+        try:
+            with self._lock:
+                return [row[0] for row in self._conn.execute(
+                    "SELECT username FROM roster WHERE last_seen >= ? ORDER BY username_key", (seen_since,)
+                )]
+        except sqlite3.Error as e:
+            logger.error(f"Error loading roster: {e}")
+            return []
+
+    def clear(self):
+        """Removes every stored profile"""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM profiles")
+                self._conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error clearing stored profiles: {e}")
+            return False
+
+    def close(self):
+        """Closes the database"""
+        with self._lock:
+            self._conn.close()
@@ -6,10 +6,14 @@ import time
 from queue import Queue
 import threading
 
-from config.settings import LOCK_FILE
+from minecraft_bot.events import GuildChatEvent, parse_guild_online
+from config.settings import LOCK_FILE, GONLINE_TIMEOUT
 
 logger = logging.getLogger('minecraft_bot.utils')
 
+# Pattern pour détecter les commandes dans un message du chat
+COMMAND_PATTERN = re.compile(r'(\w+)\b\s*(.*)', re.UNICODE)
+
 def is_process_running():
     """Checks if another instance of the bot is already running"""
     current_process = psutil.Process(os.getpid())
@@ -22,54 +26,13 @@ def is_process_running():
             pass
     return False
 
-def check_log_file(log_file_path, minecraft_client):
-    """Monitors the log file for disconnection events"""
-    pattern = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} (Connection has been lost\.|Login failed :)')
-    
-    try:
-        with open(log_file_path, 'r', encoding='utf-8') as log_file:
-            log_file.seek(0, os.SEEK_END)
-            
-            while True:
-                line = log_file.readline().strip()
-                if not line:
-                    time.sleep(0.1)
-                    continue
-                
-                match = pattern.match(line)
-                if match:
-                    logger.info(f"Detected message: {match.group(1)}. Initiating shutdown.")
-                    
-                    try:
-                        minecraft_client.send_chat_message("/gc Connection lost. Quitting...")
-                    except Exception as e:
-                        logger.error(f"Error sending quit message: {e}")
-                    
-                    try:
-                        minecraft_client.send_command('/quit')
-                        time.sleep(1)
-                    except Exception as e:
-                        logger.error(f"Error sending /quit command: {e}")
-                    
-                    minecraft_client.stop()
-                    
-                    # Restart the script
-                    script_path = os.path.abspath(__file__)
-                    command = f'start cmd /c "{script_path}"'
-                    os.system(command)
-                    
-                    os._exit(0)
-    
-    except FileNotFoundError:
-        logger.error(f"The file {log_file_path} was not found.")
-    except Exception as e:
-        logger.error(f"An error occurred in check_log_file: {e}")
-
 class OnlinePlayersTracker:
     """Tracks and manages online players information"""
     
-    def __init__(self, minecraft_client):
+    def __init__(self, minecraft_client, prefetcher=None, roster=None):
         self.minecraft_client = minecraft_client
+        self.prefetcher = prefetcher
+        self.roster = roster
         self.last_online_members = []
         self.running = False
         self.thread = None
@@ -91,46 +54,39 @@ class OnlinePlayersTracker:
     
     def _gonline_loop(self):
         """Main loop for periodically checking online players"""
-        log_file_path = 'latest.log'
-        
         while self.running:
             try:
-                # Get current file size
-                current_offset = os.path.getsize(log_file_path)
-                
-                # Execute command
-                self.minecraft_client.send_command('/g online')
-                
-                # Wait for response
-                time.sleep(3)
+                # Execute command and react as soon as the answer is complete
+                lines = self.minecraft_client.request(
+                    '/g online', start="Guild Name:", end="Online Members:", timeout=GONLINE_TIMEOUT
+                )
+                _, usernames = parse_guild_online(lines) if lines else (None, [])
                 
-                # Check if file has been modified
-                new_offset = os.path.getsize(log_file_path)
-                if new_offset > current_offset:
-                    # Read new lines
-                    with open(log_file_path, 'rb') as f:
-                        f.seek(current_offset)
-                        new_data = f.read(new_offset - current_offset)
-                    new_lines = new_data.decode('utf-8', errors='replace').splitlines()
+                if usernames:
+                    # Check if there has been a change
+                    current_members = sorted([member['username'] for member in usernames])
                     
-                    # Extract usernames
-                    usernames = self._extract_usernames_from_lines(new_lines)
-                    
-                    if usernames:
-                        # Check if there has been a change
-                        current_members = sorted([member['username'] for member in usernames])
+                    # If the list has changed or it's the first execution
+                    if current_members != self.last_online_members:
+                        logger.info(f"Change detected in online members list: {len(usernames)} members")
+                        
+                        # Keep the leaderboard roster up to date
+                        if self.roster:
+                            self.roster.add_members(current_members)
                         
-                        # If the list has changed or it's the first execution
-                        if current_members != self.last_online_members:
-                            logger.info(f"Change detected in online members list: {len(usernames)} members")
-                            
-                            # Update the list of last online members
-                            self.last_online_members = current_members
-                            
-                            # Send to Discord only if there's a change
-                            self._send_online_users_to_discord(usernames)
-                        else:
-                            logger.info(f"No change in online members list: {len(usernames)} members")
+                        # Warm the stats of members who just came online
+                        if self.prefetcher:
+                            arrivals = set(current_members) - set(self.last_online_members)
+                            if arrivals:
+                                self.prefetcher.enqueue(sorted(arrivals))
+                        
+                        # Update the list of last online members
+                        self.last_online_members = current_members
+                        
+                        # Send to Discord only if there's a change
+                        self._send_online_users_to_discord(usernames)
+                    else:
+                        logger.info(f"No change in online members list: {len(usernames)} members")
                 
                 # Wait before next check
                 time.sleep(60)  # Check every 60 seconds
@@ -139,65 +95,6 @@ class OnlinePlayersTracker:
                 logger.error(f"Error in gonline: {e}")
                 time.sleep(30)  # Wait before retrying in case of error
     
-    def _extract_usernames_from_lines(self, lines):
-        """Extracts usernames and ranks from guild online messages"""
-        usernames = []
-        current_guild_rank = None
-        guild_name = None
-        
-        # Patterns for different sections
-        guild_name_pattern = re.compile(r'Guild Name: (.+)')
-        section_pattern = re.compile(r'-- (.+) --')
-        
-        for line in lines:
-            # Remove timestamp from beginning of line
-            clean_line = re.sub(r'^[\d-]+ [\d:]+\s+', '', line)
-            
-            # Extract guild name
-            name_match = guild_name_pattern.search(clean_line)
-            if name_match:
-                guild_name = name_match.group(1).strip()
-                continue
-            
-            # Check for section headers
-            section_match = section_pattern.search(clean_line)
-            if section_match:
-                current_guild_rank = section_match.group(1).strip()
-                continue
-            
-            # Check if line contains usernames
-            if "●" in clean_line:
-                # Split the line by "●" and process each part
-                parts = clean_line.split("●")
-                
-                for part in parts[:-1]:  # Le dernier split n'a pas de joueur
-                    clean_part = part.strip()
-                    
-                    rank = None
-                    username = None
-                    
-                    if "[" in clean_part:
-                        rank_match = re.search(r'\[(.*?)\]', clean_part)
-                        if rank_match:
-                            rank = rank_match.group(1)
-                            username_part = clean_part.split("]")[-1].strip()
-                            username = re.sub(r'§.', '', username_part)
-                    else:
-                        username = re.sub(r'§.', '', clean_part.strip())
-                    
-                    if username:
-                        username = username.strip()
-                        if rank:
-                            rank = re.sub(r'§.', '', rank)
-                        
-                        usernames.append({
-                            'username': username,
-                            'rank': rank if rank else "",
-                            'guild_rank': current_guild_rank
-                        })
-        
-        return usernames
-    
     def _send_online_users_to_discord(self, usernames):
         """Sends online users information to Discord"""
         try:
@@ -267,63 +164,32 @@ class OnlinePlayersTracker:
         
         return embed
 
-    def process_commands_from_log(log_file_path, client, command_handler):
-        """Traite directement les commandes à partir du fichier log"""
-        logger = logging.getLogger('minecraft_bot.log_parser')
-        logger.info("Starting command processing from log file")
+def process_commands_from_events(minecraft_client, command_handler):
+    """Traite les commandes du chat de guilde publiées par le client"""
+    logger = logging.getLogger('minecraft_bot.log_parser')
+    logger.info("Starting command processing from client events")
+    
+    from config.settings import BOT_USERNAME
+    
+    subscription = minecraft_client.events.subscribe((GuildChatEvent,), 'commands')
+    
+    while True:
+        event = subscription.get()
         
-        from config.settings import BOT_USERNAME
+        # Vérifier que c'est une commande et pas un message du bot lui-même
+        match = COMMAND_PATTERN.match(event.message)
+        if not match or event.channel != "Guild" or event.sender == BOT_USERNAME:
+            continue
         
-        # Pattern pour détecter les commandes
-        pattern = re.compile(
-            r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} '
-            r'(?P<channel>.*?)\s*>\s*'
-            r'(?:\[.*?\]\s*)?'
-            r'(?P<sender>.*?)\s*(?:\[.*?\])?\s*:\s*'
-            r'(?P<command>\b\w+\b)\s*'
-            r'(?P<args>.*)',
-            re.UNICODE
-        )
+        command, args = match.group(1), match.group(2).strip()
+        logger.info(f"COMMAND DETECTED: {event.sender}: {command} {args}")
         
+        # Le handler ne fait qu'analyser la commande, son exécution part dans le pool
+        message = f"{command} {args}"
         try:
-            with open(log_file_path, 'r', encoding='utf-8') as log_file:
-                # Aller à la fin du fichier pour ne lire que les nouvelles entrées
-                log_file.seek(0, os.SEEK_END)
-                
-                while True:
-                    line = log_file.readline().strip()
-                    if not line:
-                        time.sleep(0.1)  # Éviter la consommation CPU excessive
-                        continue
-                    
-                    # Nettoyer la ligne des codes couleur Minecraft
-                    cleaned_line = re.sub(r'§.', '', line)
-                    
-                    # Rechercher les commandes
-                    match = pattern.search(cleaned_line)
-                    if match:
-                        channel = match.group('channel').strip()
-                        sender = match.group('sender').strip()
-                        command = match.group('command').strip()
-                        args = match.group('args').strip()
-                        
-                        # Nettoyage du sender (enlever GM, etc.)
-                        cleaned_sender = re.sub(r'\s*\[.*?\]\s*', '', sender).strip()
-                        
-                        # Vérifier que ce n'est pas un message du bot lui-même
-                        if channel == "Guild" and cleaned_sender != BOT_USERNAME:
-                            logger.info(f"COMMAND DETECTED: {cleaned_sender}: {command} {args}")
-                            
-                            # Traiter directement la commande
-                            message = f"{command} {args}"
-                            try:
-                                result = command_handler.process_command(channel, cleaned_sender, message)
-                                logger.info(f"Command result: {result}")
-                            except Exception as e:
-                                logger.error(f"Error processing command: {e}")
-                                import traceback
-                                logger.error(traceback.format_exc())
-        
+            result = command_handler.process_command(event.channel, event.sender, message)
+            logger.info(f"Command result: {result}")
         except Exception as e:
-            logger.error(f"Error in log parser: {e}")
-            import traceback
\ No newline at end of file
+            logger.error(f"Error processing command: {e}")
+            import traceback
+            logger.error(traceback.format_exc())
@@ -0,0 +1,219 @@
+import os
+import math
+import time
+import struct
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger('shared.cache_utils')
+
+class TTLCache:
+    """Cache borné thread-safe avec expiration (TTL) et éviction LRU"""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Retourne la valeur associée à la clé si elle n'a pas expiré"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                # Entrée expirée
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Ajoute ou remplace une entrée, en évinçant la plus ancienne si nécessaire"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Supprime une entrée si elle existe"""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """Retourne les compteurs du cache"""
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+class _Call:
+    """Appel en cours partagé par SingleFlight"""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Regroupe les appels simultanés portant sur la même clé en un seul appel"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        # Nombre d'appels ayant réutilisé un appel déjà en cours
+        self.shared = 0
+
+    def do(self, key, func, *args, join_keys=(), **kwargs):
+        """Exécute func une seule fois par clé, les autres appelants attendent son résultat
+
+        Sans appel en cours pour key, un appel en cours pour l'une des join_keys,
+        dont le résultat convient aussi, est attendu à la place.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            for join_key in join_keys:
+                if call is not None:
+                    break
+                call = self._calls.get(join_key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self):
+        """Retourne le nombre d'appels en cours"""
+        with self._lock:
+            return len(self._calls)
+
+class BloomFilter:
+    """Filtre de Bloom persistant pour tester rapidement l'appartenance à un ensemble"""
+
+    _HEADER = struct.Struct('<dII')
+
+    def __init__(self, capacity, error_rate, created_at=None):
+        # Taille et nombre de hachages optimaux pour la capacité et le taux d'erreur
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.created_at = time.time() if created_at is None else created_at
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """Ajoute une clé au filtre"""
+        with self._lock:
+            for pos in self._positions(key):
+                self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        with self._lock:
+            return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def age(self):
+        """Retourne l'âge du filtre en secondes"""
+        return time.time() - self.created_at
+
+    def save(self, file_path):
+        """Sauvegarde le filtre sur disque de façon atomique"""
+        tmp_path = f"{file_path}.tmp"
+        try:
+            with self._lock:
+                data = self._HEADER.pack(self.created_at, self.num_bits, self.num_hashes) + bytes(self.bits)
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, file_path)
+            return True
+        except OSError as e:
+            logger.error(f"Erreur lors de la sauvegarde du filtre {file_path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, file_path, capacity, error_rate, max_age=None):
+        """Charge un filtre depuis le disque, ou en crée un nouveau s'il est absent, invalide ou trop ancien"""
+        bloom = cls(capacity, error_rate)
+        if not os.path.exists(file_path):
+            return bloom
+
+        try:
+            with open(file_path, 'rb') as file:
+                data = file.read()
+            created_at, num_bits, num_hashes = cls._HEADER.unpack_from(data)
+            bits = data[cls._HEADER.size:]
+        except (OSError, struct.error) as e:
+            logger.error(f"Erreur lors du chargement du filtre {file_path}: {e}")
+            return bloom
+
+        if num_bits != bloom.num_bits or num_hashes != bloom.num_hashes or len(bits) != len(bloom.bits):
+            logger.info(f"Paramètres du filtre {file_path} modifiés, nouveau filtre créé")
+            return bloom
+        if max_age is not None and time.time() - created_at > max_age:
+            logger.info(f"Filtre {file_path} expiré, nouveau filtre créé")
+            return bloom
+
+        bloom.bits = bytearray(bits)
+        bloom.created_at = created_at
+        return bloom
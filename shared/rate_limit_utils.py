@@ -0,0 +1,149 @@
+import time
+import random
+import threading
+from collections import deque
+
+class TokenBucket:
+    """Seau à jetons thread-safe dont le débit peut être ajusté à chaud"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        """Prend des jetons s'ils sont disponibles, sans attendre"""
+        with self._cond:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, timeout=None):
+        """Attend que des jetons soient disponibles, retourne False après le timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+
+                wait = (tokens - self._tokens) / self.rate
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def set_rate(self, rate):
+        """Modifie le débit de remplissage (jetons par seconde)"""
+        with self._cond:
+            self._refill()
+            self.rate = rate
+            self._cond.notify_all()
+
+    def tokens(self):
+        """Retourne le nombre de jetons disponibles"""
+        with self._cond:
+            self._refill()
+            return self._tokens
+
+class CircuitBreaker:
+    """Disjoncteur qui coupe les appels quand le taux d'erreur ou la latence dépasse un seuil"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, window_size, min_calls, failure_ratio, slow_call_threshold, open_duration):
+        self.window_size = window_size
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_threshold = slow_call_threshold
+        self.open_duration = open_duration
+
+        self.state = self.CLOSED
+        self.trip_count = 0
+        self._outcomes = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Indique si un appel peut être tenté"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_duration:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+
+            # Demi-ouvert: un seul appel d'essai à la fois
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def release(self):
+        """Abandonne un appel autorisé sans résultat, libère l'essai du demi-ouvert"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_running = False
+
+    def record_success(self, latency):
+        """Enregistre un appel réussi et sa durée en secondes"""
+        # Un appel trop lent compte comme un échec
+        if latency > self.slow_call_threshold:
+            self.record_failure()
+            return
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                self._trial_running = False
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        """Enregistre un appel en échec"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trip()
+                return
+
+            self._outcomes.append(False)
+            if len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_ratio:
+                    self._trip()
+
+    def _trip(self):
+        self.state = self.OPEN
+        self.trip_count += 1
+        self._opened_at = time.monotonic()
+        self._trial_running = False
+        self._outcomes.clear()
+
+    def retry_after(self):
+        """Retourne le nombre de secondes avant le prochain essai (0 si fermé)"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(self.open_duration - (time.monotonic() - self._opened_at), 0.0)
+
+def backoff_delay(attempt, base, maximum):
+    """Délai exponentiel avec gigue complète pour la tentative donnée (0 = première relance)"""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
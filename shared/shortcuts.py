@@ -1,41 +1,106 @@
 import logging
 import re
+import threading
 from shared.file_utils import load_json_file, save_json_file
 from config.settings import SHORTCUTS_FILE, USER_SHORTCUTS_FILE
 
 logger = logging.getLogger('shared.shortcuts')
 
+# Nombre maximal de raccourcis développés l'un dans l'autre
+MAX_SHORTCUT_DEPTH = 2
+
+class ShortcutError(ValueError):
+    """Raccourci invalide : récursion, cycle ou imbrication trop profonde"""
+
+def _expand(shortcuts, name):
+    """Développe un raccourci jusqu'à une commande qui n'en est pas un, renvoie (commande, arguments)"""
+    command, _, args = shortcuts[name].strip().partition(' ')
+    if command == name and not args:
+        raise ShortcutError(f'Direct recursion in shortcut "{name}"')
+    
+    chain = [name]
+    # Un raccourci qui reprend son propre nom surcharge la commande du même nom
+    while command in shortcuts and command != chain[-1]:
+        if command in chain:
+            raise ShortcutError(f"Shortcut cycle: {' → '.join(chain + [command])}")
+        if len(chain) >= MAX_SHORTCUT_DEPTH:
+            raise ShortcutError(f'Maximum shortcut nesting depth ({MAX_SHORTCUT_DEPTH}) exceeded')
+        chain.append(command)
+        target_command, _, target_args = shortcuts[command].strip().partition(' ')
+        args = f"{target_args} {args}".strip()
+        command = target_command
+    return command, args
+
+def compile_shortcuts(shortcuts):
+    """Développe tous les raccourcis d'un utilisateur, les invalides gardent leur erreur"""
+    compiled = {}
+    for name in shortcuts:
+        try:
+            compiled[name] = _expand(shortcuts, name)
+        except ShortcutError as e:
+            compiled[name] = e
+    return compiled
+
 class ShortcutManager:
     """Gestionnaire des raccourcis de commandes et alias utilisateurs"""
     
     def __init__(self):
         self.shortcuts = load_json_file(SHORTCUTS_FILE, {})
         self.user_shortcuts = load_json_file(USER_SHORTCUTS_FILE, {})
+        
+        # Raccourcis déjà développés, par utilisateur, recalculés après chaque modification
+        self._compiled = {}
+        # Le développement se fait sur le fil de réception, les modifications sur les fils de commandes
+        self._lock = threading.Lock()
     
     # --- Raccourcis de commandes ---
     
     def save_shortcut(self, sender, shortcut_name, shortcut_command):
-        """Sauvegarde un raccourci de commande"""
-        if sender not in self.shortcuts:
-            self.shortcuts[sender] = {}
+        """Sauvegarde un raccourci de commande, lève ShortcutError s'il crée une récursion ou un cycle"""
+        with self._lock:
+            # Copie modifiée puis remplacée : un développement en cours garde l'ancienne version
+            shortcuts = dict(self.shortcuts.get(sender, {}))
+            shortcuts[shortcut_name] = shortcut_command
+            
+            # Les cycles sont détectés une seule fois, à la définition, sur la seule chaîne du nouveau raccourci
+            _expand(shortcuts, shortcut_name)
             
-        self.shortcuts[sender][shortcut_name] = shortcut_command
-        return save_json_file(SHORTCUTS_FILE, self.shortcuts)
+            self.shortcuts[sender] = shortcuts
+            self._compiled.pop(sender, None)
+            return save_json_file(SHORTCUTS_FILE, self.shortcuts)
     
     def load_shortcut(self, sender, shortcut_name):
         """Charge un raccourci de commande"""
         return self.shortcuts.get(sender, {}).get(shortcut_name)
     
+    def expand_shortcut(self, sender, shortcut_name):
+        """Renvoie (commande, arguments) d'un raccourci développé, None si ce n'en est pas un"""
+        compiled = self._compiled.get(sender)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(sender)
+                if compiled is None:
+                    compiled = self._compiled[sender] = compile_shortcuts(self.shortcuts.get(sender, {}))
+        
+        expansion = compiled.get(shortcut_name)
+        if isinstance(expansion, ShortcutError):
+            raise expansion
+        return expansion
+    
     def delete_shortcut(self, sender, shortcut_name):
         """Supprime un raccourci de commande"""
-        if sender in self.shortcuts and shortcut_name in self.shortcuts[sender]:
-            del self.shortcuts[sender][shortcut_name]
-            
-            # Supprimer le sender s'il n'a plus de raccourcis
-            if not self.shortcuts[sender]:
-                del self.shortcuts[sender]
+        with self._lock:
+            if sender in self.shortcuts and shortcut_name in self.shortcuts[sender]:
+                shortcuts = {name: command for name, command in self.shortcuts[sender].items() if name != shortcut_name}
                 
-            return save_json_file(SHORTCUTS_FILE, self.shortcuts)
+                # Supprimer le sender s'il n'a plus de raccourcis
+                if shortcuts:
+                    self.shortcuts[sender] = shortcuts
+                else:
+                    del self.shortcuts[sender]
+                
+                self._compiled.pop(sender, None)
+                return save_json_file(SHORTCUTS_FILE, self.shortcuts)
         return False
     
     def list_shortcuts(self, sender):
@@ -8,13 +8,14 @@ import colorama
 import logging
 import threading
 
-from config.settings import MINECRAFT_LOG_FILE, LOCK_FILE
+from config.settings import MINECRAFT_LOG_FILE, LOCK_FILE, PREFETCH_ENABLED
 from shared.logging_utils import setup_logger
 from shared.file_utils import create_lock_file, remove_lock_file
 from minecraft_bot.client import MinecraftClient
 from minecraft_bot.relay import MinecraftDiscordRelay
 from minecraft_bot.commands import CommandHandler
-from minecraft_bot.utils import check_log_file, is_process_running, OnlinePlayersTracker, process_commands_from_log
+from minecraft_bot.prefetch import StatsPrefetcher
+from minecraft_bot.utils import is_process_running, OnlinePlayersTracker, process_commands_from_events
 
 def main():
     # Initialize colorama for Windows ANSI color support
@@ -49,8 +50,11 @@ def main():
         relay = MinecraftDiscordRelay(client)
         logger.info("Discord relay initialized")
         
+        # Initialize stats prefetcher (opt-in)
+        prefetcher = StatsPrefetcher(command_handler.scraper) if PREFETCH_ENABLED else None
+        
         # Initialize online players tracker
-        tracker = OnlinePlayersTracker(client)
+        tracker = OnlinePlayersTracker(client, prefetcher, command_handler.leaderboard_refresher)
         logger.info("Online players tracker initialized")
         
         # Start the client
@@ -65,27 +69,23 @@ def main():
         relay.start()
         logger.info("Discord relay started")
         
+        # Start stats prefetcher
+        if prefetcher:
+            prefetcher.start()
+            logger.info("Stats prefetcher started")
+        
         # Start online players tracker
         tracker.start()
         logger.info("Online players tracker started")
         
-        # Start log file monitoring thread for disconnection detection
-        log_monitor_thread = threading.Thread(
-            target=check_log_file,
-            args=(MINECRAFT_LOG_FILE, client),
-            daemon=True
-        )
-        log_monitor_thread.start()
-        logger.info("Log file monitoring started")
-        
-        # Démarrer le thread de traitement des commandes à partir des logs
+        # Démarrer le thread de traitement des commandes publiées par le client
         command_thread = threading.Thread(
-            target=process_commands_from_log,
-            args=(MINECRAFT_LOG_FILE, client, command_handler),
+            target=process_commands_from_events,
+            args=(client, command_handler),
             daemon=True
         )
         command_thread.start()
-        logger.info("Command processing from logs started")
+        logger.info("Command processing from client events started")
         
         # Main loop - keep running until interrupted
         try:
@@ -98,6 +98,8 @@ def main():
             # Clean shutdown
             logger.info("Shutting down...")
             tracker.stop()
+            if prefetcher:
+                prefetcher.stop()
             relay.stop()
             command_handler.stop()
             client.stop()